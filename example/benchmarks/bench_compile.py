@@ -0,0 +1,43 @@
+import pytest
+from django.db import connection
+from django.db.models import Avg, Count, Max
+
+from benchmarks.conftest import SPAN, START
+from metrics.models import Metric
+
+# compiling doesn't query the database
+pytestmark = pytest.mark.benchmark(group='compile')
+
+RANGE = (START, START + SPAN)
+
+
+def compile_sql(build):
+    return build().query.get_compiler(connection=connection).as_sql()
+
+
+def bench_compile_time_bucket(benchmark):
+    benchmark(compile_sql, lambda: (
+        Metric.timescale
+        .filter(time__range=RANGE, device=1)
+        .time_bucket('time', '1 hour')
+        .annotate(Avg('temperature'), Max('temperature'))
+    ))
+
+
+def bench_compile_time_bucket_gapfill(benchmark):
+    benchmark(compile_sql, lambda: (
+        Metric.timescale
+        .filter(time__range=RANGE)
+        .time_bucket_gapfill('time', '1 hour', *RANGE, datapoints=240, annotations={'avg_temperature': Avg('temperature')},
+                             fill='interpolate')
+    ))
+
+
+def bench_compile_histogram(benchmark):
+    benchmark(compile_sql, lambda: (
+        Metric.timescale
+        .filter(time__range=RANGE)
+        .values('device')
+        .histogram(field='temperature', min_value=0.0, max_value=40.0, num_of_buckets=20)
+        .annotate(Count('device'))
+    ))
@@ -0,0 +1,43 @@
+import pytest
+
+from benchmarks.conftest import generate_rows
+from metrics.models import Metric
+
+pytestmark = [pytest.mark.django_db, pytest.mark.benchmark(group='ingest')]
+
+
+def bench_create(benchmark):
+    # one INSERT per row, sampled on a thousand rows
+    data = list(generate_rows(1000))
+
+    def create():
+        for time, temperature, device in data:
+            Metric.objects.create(time=time, temperature=temperature, device=device)
+
+    benchmark.pedantic(create, rounds=3)
+
+
+def bench_bulk_create(benchmark, benchmark_memory, rows):
+    data = list(generate_rows(rows))
+
+    def bulk_create():
+        Metric.objects.bulk_create(
+            [Metric(time=time, temperature=temperature, device=device) for time, temperature, device in data],
+            batch_size=10000,
+        )
+
+    benchmark_memory(bulk_create)
+    benchmark.pedantic(bulk_create, rounds=3)
+
+
+@pytest.mark.parametrize('format', ['csv', 'binary'])
+def bench_copy_from(benchmark, benchmark_memory, rows, format):
+    from timescale.db.copy import is_psycopg3
+    if format == 'binary' and not is_psycopg3:
+        pytest.skip('The binary format requires psycopg 3.')
+
+    def copy_from():
+        Metric.timescale.copy_from(generate_rows(rows), columns=['time', 'temperature', 'device'], format=format)
+
+    benchmark_memory(copy_from)
+    benchmark.pedantic(copy_from, rounds=3)
@@ -0,0 +1,54 @@
+import pytest
+from django.db.models import Avg, Count
+
+from benchmarks.conftest import SPAN, START
+from metrics.models import Metric
+
+pytestmark = [pytest.mark.django_db, pytest.mark.benchmark(group='queries')]
+
+RANGE = (START, START + SPAN)
+
+
+def bench_time_bucket(benchmark, benchmark_memory, metrics):
+    queryset = Metric.timescale.filter(time__range=RANGE).time_bucket('time', '1 hour').annotate(Avg('temperature'))
+
+    benchmark_memory(lambda: list(queryset.all()))
+    result = benchmark(lambda: list(queryset.all()))
+    assert len(result) == 7 * 24
+
+
+def bench_time_bucket_gapfill(benchmark, benchmark_memory, metrics):
+    queryset = (Metric.timescale
+                .filter(time__range=RANGE)
+                .time_bucket_gapfill('time', '1 hour', *RANGE, annotations={'avg_temperature': Avg('temperature')},
+                                     fill='locf'))
+
+    benchmark_memory(lambda: list(queryset.all()))
+    benchmark(lambda: list(queryset.all()))
+
+
+def bench_histogram(benchmark, benchmark_memory, metrics):
+    queryset = (Metric.timescale
+                .filter(time__range=RANGE)
+                .values('device')
+                .histogram(field='temperature', min_value=0.0, max_value=40.0, num_of_buckets=20)
+                .annotate(Count('device')))
+
+    benchmark_memory(lambda: list(queryset.all()))
+    benchmark(lambda: list(queryset.all()))
+
+
+def bench_lttb(benchmark, benchmark_memory, toolkit, metrics):
+    queryset = Metric.timescale.filter(time__range=RANGE).lttb('time', 'temperature', 500)
+
+    benchmark_memory(lambda: list(queryset.all()))
+    benchmark(lambda: list(queryset.all()))
+
+
+@pytest.mark.parametrize('normalise_datetimes', [False, ['time']], ids=['raw', 'normalised'])
+def bench_to_list(benchmark, benchmark_memory, metrics, normalise_datetimes):
+    queryset = Metric.timescale.filter(time__range=RANGE).values('time', 'temperature', 'device')
+
+    benchmark_memory(lambda: queryset.all().to_list(normalise_datetimes=normalise_datetimes))
+    result = benchmark(lambda: queryset.all().to_list(normalise_datetimes=normalise_datetimes))
+    assert len(result) == metrics
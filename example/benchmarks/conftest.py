@@ -0,0 +1,87 @@
+import random
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.db import connection
+
+from metrics.models import Metric
+
+
+START = datetime(2021, 1, 4, tzinfo=timezone.utc)
+
+# the generated data always spans a week, larger sizes are denser
+SPAN = timedelta(days=7)
+
+DEVICES = 10
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--rows', default='10000,100000',
+        help='Comma separated numbers of rows the queries are benchmarked on (default 10000,100000).',
+    )
+
+
+def pytest_generate_tests(metafunc):
+    sizes = [int(size) for size in metafunc.config.getoption('rows').split(',')]
+    if 'metrics' in metafunc.fixturenames:
+        metafunc.parametrize('metrics', sizes, indirect=True, scope='session')
+    if 'rows' in metafunc.fixturenames:
+        metafunc.parametrize('rows', sizes, scope='session')
+
+
+def generate_rows(count, seed=0):
+    """
+    Generate `count` reproducible (time, temperature, device) rows spread
+    evenly over `SPAN` from `START`.
+    """
+    generator = random.Random(seed)
+    step = SPAN / count
+    for index in range(count):
+        yield START + step * index, 20 + generator.gauss(0, 5), index % DEVICES
+
+
+@pytest.fixture(scope='session')
+def toolkit(django_db_setup, django_db_blocker):
+    """
+    Create the timescaledb_toolkit extension, benchmarks of the toolkit
+    functions are skipped when it isn't available.
+    """
+    with django_db_blocker.unblock(), connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'timescaledb_toolkit'")
+        if cursor.fetchone() is None:
+            pytest.skip('The timescaledb_toolkit extension is not available.')
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS timescaledb_toolkit')
+
+
+@pytest.fixture(scope='session')
+def metrics(request, django_db_setup, django_db_blocker):
+    """
+    Load the parametrized number of rows into the Metric hypertable once per
+    size, the benchmarks run in transactions that are rolled back.
+    """
+    with django_db_blocker.unblock():
+        with connection.cursor() as cursor:
+            cursor.execute('TRUNCATE %s' % connection.ops.quote_name(Metric._meta.db_table))
+        Metric.timescale.copy_from(generate_rows(request.param), columns=['time', 'temperature', 'device'])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE %s' % connection.ops.quote_name(Metric._meta.db_table))
+    return request.param
+
+
+@pytest.fixture
+def benchmark_memory(benchmark):
+    """
+    Run a function once under tracemalloc and store its peak Python memory in
+    the `peak_memory` extra info of the benchmark, it's saved with the results
+    so `--benchmark-compare` runs can be checked for memory regressions too.
+    """
+    def measure(function, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            function(*args, **kwargs)
+            benchmark.extra_info['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return measure
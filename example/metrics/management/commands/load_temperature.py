@@ -9,7 +9,9 @@ class Command(BaseCommand):
     DEVICES = [1234, 1245, 1236]
 
     def handle(self, *args, **options):
-        for i in range(1000):
-            timestamp = timezone.now() - timedelta(minutes=i * 5)
-            Metric.objects.create(time=timestamp, temperature=uniform(51.1, 53.3), device=choice(self.DEVICES))
-        
\ No newline at end of file
+        now = timezone.now()
+        rows = (
+            (now - timedelta(minutes=i * 5), uniform(51.1, 53.3), choice(self.DEVICES))
+            for i in range(1000)
+        )
+        Metric.timescale.copy_from(rows, columns=['time', 'temperature', 'device'])
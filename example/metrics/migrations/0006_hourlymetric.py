@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:16
+
+from django.db import migrations, models
+import timescale.db.operations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metrics', '0005_rename_sampletest_anothermetricfromtimescalemodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlyMetric',
+            fields=[
+                ('bucket', models.DateTimeField(primary_key=True, serialize=False)),
+                ('device', models.IntegerField()),
+                ('avg_temperature', models.FloatField()),
+                ('max_temperature', models.FloatField()),
+            ],
+            options={
+                'abstract': False,
+                'managed': False,
+            },
+        ),
+        timescale.db.operations.CreateContinuousAggregate(
+            model_name='HourlyMetric',
+            definition='SELECT "metrics_metric"."device" AS "device", time_bucket(\'1 hour\', "metrics_metric"."time") AS "bucket", AVG("metrics_metric"."temperature") AS "avg_temperature", MAX("metrics_metric"."temperature") AS "max_temperature" FROM "metrics_metric" GROUP BY 1, 2',
+        ),
+        timescale.db.operations.AddContinuousAggregatePolicy(
+            model_name='HourlyMetric',
+            start_offset='3 days',
+            end_offset='1 hour',
+            schedule_interval='1 hour',
+        ),
+    ]
@@ -1,8 +1,10 @@
 from django.db import models
+from django.db.models import Avg, Max
 from timescale.db.models.fields import TimescaleDateTimeField
+from timescale.db.models.expressions import TimeBucket
 from typing import Dict
 
-from timescale.db.models.models import TimescaleModel
+from timescale.db.models.models import TimescaleModel, TimescaleContinuousAggregate
 from timescale.db.models.managers import TimescaleManager
 
 
@@ -20,3 +22,16 @@ class Metric(models.Model):
 
 class AnotherMetricFromTimeScaleModel(TimescaleModel):
     value = models.FloatField(default=0.0)
+
+
+class HourlyMetric(TimescaleContinuousAggregate):
+    bucket = models.DateTimeField(primary_key=True)
+    device = models.IntegerField()
+    avg_temperature = models.FloatField()
+    max_temperature = models.FloatField()
+
+    @classmethod
+    def get_aggregate_queryset(cls):
+        return (Metric.timescale
+                .values('device', bucket=TimeBucket('time', '1 hour'))
+                .annotate(avg_temperature=Avg('temperature'), max_temperature=Max('temperature')))
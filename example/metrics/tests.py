@@ -1,17 +1,50 @@
+from io import StringIO
+from unittest import skipUnless
+
+from asgiref.sync import sync_to_async
+from timescale.db.advisor import advise_chunk_interval, format_interval, recommend_interval
+from timescale.db.aio import has_native_async
+from timescale.db.copy import is_psycopg3
+from timescale.db.models.arrays import numpy
 from timescale.db.models.fields import TimescaleDateTimeField
-from timescale.db.models.expressions import TimeBucketNG
-from metrics.models import Metric
+from timescale.db.models.expressions import TimeBucket, TimeBucketNG
+from metrics.models import Metric, HourlyMetric
 from django.utils import timezone
+from datetime import timedelta, timezone as dt_timezone
 from dateutil.relativedelta import relativedelta
-from django.test import TestCase
-from django.db.models import Avg
-from timescale.db.models.aggregates import First
+from django.db import IntegrityError, connection, models, transaction
+from django.contrib.postgres.fields import ArrayField
+from django.core.management import CommandError, call_command
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.db.models import Avg, Max, Q
+from timescale.db.instrumentation import QueryInstrumentation, query_instrumented
+from timescale.db.models.aggregates import (
+    ApproxPercentile, Average, CounterAgg, Delta, First, NumVals, PercentileAgg, Rate, Rollup, StatsAgg, StatsStdDev,
+    TimeWeight,
+)
+from timescale.db.models.exclusion import FullHypertableScanWarning
+from timescale.db.models.indexes import HypertableIndex
+from timescale.db.models.managers import TimescaleManager
+from timescale.db.models.routing import get_continuous_aggregate_route
+from timescale.db.models.utils import get_time_bounds, parse_interval
+from timescale.db.operations import CreateContinuousAggregate
 
 
 class TimescaleDBTests(TestCase):
     def setUp(self):
         super().setUp()
 
+    def test_time_bucket_annotations(self):
+        timestamp = timezone.now().replace(minute=0, second=0, microsecond=0)
+        Metric.objects.create(time=timestamp, temperature=10)
+        Metric.objects.create(time=timestamp + timedelta(minutes=10), temperature=20)
+
+        metrics = Metric.timescale.time_bucket('time', '1 hour', {'avg_temperature': Avg('temperature')})
+
+        # verify
+        self.assertEqual(list(metrics), [{'bucket': timestamp, 'avg_temperature': 15.0}])
+
     def test_time_bucket_ng(self):
         timestamp = timezone.now().replace(day=1)
 
@@ -39,4 +72,775 @@ class TimescaleDBTests(TestCase):
         # XXX: Remove
         self.assertEqual(metrics[0]["temperature__first"], 14.0)
         self.assertEqual(metrics[1]["temperature__first"], 8.0)
-        
+
+    def test_continuous_aggregate(self):
+        timestamp = timezone.now().replace(minute=0, second=0, microsecond=0) - relativedelta(hours=2)
+
+        Metric.objects.create(time=timestamp + timedelta(minutes=10), temperature=10, device=1)
+        Metric.objects.create(time=timestamp + timedelta(minutes=20), temperature=20, device=1)
+        Metric.objects.create(time=timestamp + timedelta(minutes=30), temperature=30, device=2)
+
+        # the rollup has not been refreshed, real-time aggregation covers the rows
+        self.assertFalse(HourlyMetric.timescale.is_materialized_only())
+        metrics = HourlyMetric.objects.filter(device=1).values('bucket', 'avg_temperature', 'max_temperature')
+
+        # verify
+        self.assertEqual(list(metrics), [{'bucket': timestamp, 'avg_temperature': 15.0, 'max_temperature': 20.0}])
+
+    def test_continuous_aggregate_definition(self):
+        operation = CreateContinuousAggregate('HourlyMetric', definition='SELECT 1', materialized_only=True)
+        self.assertEqual(operation.deconstruct(), (
+            'CreateContinuousAggregate', [],
+            {'model_name': 'HourlyMetric', 'definition': 'SELECT 1', 'materialized_only': True},
+        ))
+
+        # the definition frozen into the migration is the one of the current model
+        with connection.schema_editor(collect_sql=True) as schema_editor:
+            definition = schema_editor.compile_continuous_aggregate(HourlyMetric.get_aggregate_queryset())
+        migration = MigrationLoader(connection).get_migration('metrics', '0006_hourlymetric')
+        self.assertEqual(migration.operations[1].definition, definition)
+
+    def test_continuous_aggregate_routing(self):
+        timestamp = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0) - relativedelta(days=1)
+
+        Metric.objects.create(time=timestamp + timedelta(hours=1), temperature=10, device=1)
+        Metric.objects.create(time=timestamp + timedelta(hours=5), temperature=20, device=1)
+        Metric.objects.create(time=timestamp + timedelta(hours=5), temperature=30, device=2)
+
+        # daily maximum, answerable from the hourly rollup
+        metrics = (Metric.timescale
+                   .filter(device=1, time__gte=timestamp)
+                   .time_bucket('time', '1 day')
+                   .annotate(Max('temperature')))
+
+        # verify
+        self.assertIsNotNone(get_continuous_aggregate_route(metrics))
+        self.assertEqual(list(metrics.use_continuous_aggregates()), list(metrics))
+        self.assertEqual(list(metrics.use_continuous_aggregates()), [{'bucket': timestamp, 'temperature__max': 20.0}])
+
+    def test_drop_chunks(self):
+        timestamp = timezone.now()
+
+        Metric.objects.create(time=timestamp - relativedelta(days=30), temperature=10)
+        Metric.objects.create(time=timestamp, temperature=20)
+
+        # drop the chunk of last month
+        dropped = Metric.timescale.drop_chunks(older_than='7 days')
+
+        # verify
+        self.assertEqual(len(dropped), 1)
+        self.assertEqual(list(Metric.objects.values_list('temperature', flat=True)), [20.0])
+
+    def test_copy_from(self):
+        timestamp = timezone.now()
+
+        # rows are streamed from a generator in batches
+        rows = ((timestamp - timedelta(minutes=i), float(i), i % 3) for i in range(100))
+        copied = Metric.timescale.copy_from(rows, columns=['time', 'temperature', 'device'], batch_rows=30)
+
+        # verify
+        self.assertEqual(copied, 100)
+        self.assertEqual(Metric.objects.count(), 100)
+        self.assertEqual(Metric.objects.filter(device=0).count(), 34)
+
+    @skipUnless(is_psycopg3, "The binary COPY format requires psycopg 3.")
+    def test_copy_from_binary(self):
+        timestamp = timezone.now()
+
+        rows = [{'time': timestamp - timedelta(minutes=i), 'temperature': i / 2, 'device': i % 3} for i in range(10)]
+        copied = Metric.timescale.copy_from(rows, columns=['time', 'temperature', 'device'], format='binary')
+
+        # verify
+        self.assertEqual(copied, 10)
+        self.assertEqual(
+            list(Metric.objects.order_by('-time').values_list('time', 'temperature', 'device')),
+            [(row['time'], row['temperature'], row['device']) for row in rows],
+        )
+
+    def test_stream(self):
+        timestamp = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+        for hours in range(3):
+            Metric.objects.create(time=timestamp - timedelta(hours=hours), temperature=hours)
+
+        # stream the hourly buckets in batches of two
+        metrics = Metric.timescale.time_bucket('time', '1 hour').annotate(Avg('temperature'))
+        batches = list(metrics.stream(chunk_size=2, normalise_datetimes=True, batches=True))
+
+        # verify
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        self.assertEqual(batches[0][0], {'bucket': timestamp.isoformat(), 'temperature__avg': 0.0})
+        self.assertEqual(batches[0] + batches[1], metrics.to_list(normalise_datetimes=True))
+
+    def test_to_list_normalise_datetimes(self):
+        timestamp = timezone.now()
+        Metric.objects.create(time=timestamp, temperature=10)
+        metrics = Metric.timescale.values('time', 'temperature')
+
+        # verify, only the bucket is normalised by default
+        self.assertEqual(metrics.to_list(normalise_datetimes=True), [{'time': timestamp, 'temperature': 10.0}])
+        self.assertEqual(
+            metrics.to_list(normalise_datetimes=['time']), [{'time': timestamp.isoformat(), 'temperature': 10.0}]
+        )
+
+    @skipUnless(numpy, "to_arrays requires numpy.")
+    def test_to_arrays(self):
+        timestamp = timezone.now().astimezone(dt_timezone(timedelta(hours=2)))
+        Metric.objects.create(time=timestamp, temperature=10, device=1)
+        Metric.objects.create(time=timestamp - timedelta(hours=1), temperature=20, device=2)
+
+        hot = Q(temperature__gt=15)
+        arrays = (Metric.timescale
+                  .values('device')
+                  .annotate(latest=Max('time'), hot=Max('temperature', filter=hot),
+                            hot_device=Max('device', filter=hot))
+                  .order_by('device')
+                  .to_arrays())
+
+        # verify, NULLs become NaN and datetimes naive UTC
+        self.assertEqual(arrays['device'].tolist(), [1, 2])
+        self.assertEqual(arrays['hot_device'].dtype, numpy.float64)
+        self.assertTrue(numpy.isnan(arrays['hot'][0]) and numpy.isnan(arrays['hot_device'][0]))
+        self.assertEqual((arrays['hot'][1], arrays['hot_device'][1]), (20.0, 2.0))
+        self.assertEqual(arrays['latest'].dtype, numpy.dtype('datetime64[us]'))
+        self.assertEqual(
+            arrays['latest'][0], numpy.datetime64(timestamp.astimezone(dt_timezone.utc).replace(tzinfo=None), 'us')
+        )
+
+    def test_cache_buckets(self):
+        timestamp = timezone.now().replace(minute=0, second=0, microsecond=0)
+        Metric.objects.create(time=timestamp - timedelta(hours=3), temperature=10)
+
+        metrics = (Metric.timescale
+                   .filter(time__gte=timestamp - timedelta(hours=4))
+                   .time_bucket('time', '1 hour')
+                   .annotate(Avg('temperature'))
+                   .cache_buckets(settle='10 minutes'))
+        self.assertEqual(metrics[0]['temperature__avg'], 10.0)
+
+        # late data in a closed bucket is served from the cache until the model is invalidated
+        Metric.objects.create(time=timestamp - timedelta(hours=3), temperature=20)
+        self.assertEqual(metrics.all()[0]['temperature__avg'], 10.0)
+
+        Metric.timescale.invalidate_bucket_cache()
+        self.assertEqual(metrics.all()[0]['temperature__avg'], 15.0)
+
+    def test_cache_buckets_moving_window(self):
+        now = timezone.now()
+        timestamp = now.replace(minute=0, second=0, microsecond=0)
+        Metric.objects.create(time=timestamp - timedelta(hours=3), temperature=10)
+
+        def window(now):
+            return (Metric.timescale
+                    .filter(time__gte=now - timedelta(hours=5))
+                    .time_bucket('time', '1 hour')
+                    .annotate(Avg('temperature'))
+                    .cache_buckets(settle='10 minutes'))
+
+        self.assertEqual(window(now)[0]['temperature__avg'], 10.0)
+
+        # the window moved with now(), the closed buckets are still served from the cache
+        Metric.objects.create(time=timestamp - timedelta(hours=3), temperature=20)
+        self.assertEqual(window(now + timedelta(seconds=30))[0]['temperature__avg'], 10.0)
+
+    def test_cache_buckets_exclusive_start(self):
+        timestamp = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=3)
+        Metric.objects.create(time=timestamp, temperature=10)
+        Metric.objects.create(time=timestamp + timedelta(minutes=30), temperature=20)
+
+        def metrics(**bounds):
+            return (Metric.timescale
+                    .filter(**bounds)
+                    .time_bucket('time', '1 hour')
+                    .annotate(Avg('temperature'))
+                    .cache_buckets(settle='10 minutes'))
+
+        # verify, the row at the bound is only in the bucket of time__gte
+        self.assertEqual(metrics(time__gte=timestamp)[0]['temperature__avg'], 15.0)
+        self.assertEqual(metrics(time__gt=timestamp)[0]['temperature__avg'], 20.0)
+        self.assertEqual(metrics(time__gte=timestamp)[0]['temperature__avg'], 15.0)
+
+    def test_parse_interval(self):
+        self.assertEqual(parse_interval('5 ms'), timedelta(milliseconds=5))
+        self.assertEqual(parse_interval('10us'), timedelta(microseconds=10))
+        self.assertEqual(parse_interval('1 hour 30 mins'), timedelta(minutes=90))
+        self.assertEqual(parse_interval('2 weeks'), timedelta(weeks=2))
+        self.assertIsNone(parse_interval('1 month'))
+
+    def test_bucket_filter_time_bounds(self):
+        timestamp = timezone.now().replace(minute=0, second=0, microsecond=0)
+        Metric.objects.create(time=timestamp - timedelta(minutes=30), temperature=10)
+
+        metrics = (Metric.timescale
+                   .time_bucket('time', '1 hour')
+                   .annotate(Avg('temperature'))
+                   .filter(bucket__range=(timestamp - timedelta(hours=1), timestamp - timedelta(minutes=30))))
+
+        # verify, the bucket filter implies constant bounds on time
+        self.assertEqual(
+            get_time_bounds(metrics.query, Metric._meta.get_field('time')),
+            (timestamp - timedelta(hours=1), timestamp),
+        )
+        self.assertEqual(metrics[0]['temperature__avg'], 10.0)
+
+    @override_settings(TIMESCALE_WARN_FULL_SCANS=True)
+    def test_full_hypertable_scan_warning(self):
+        with self.assertWarns(FullHypertableScanWarning):
+            list(Metric.timescale.filter(device=1))
+
+    def test_explain_chunks(self):
+        timestamp = timezone.now()
+        Metric.objects.create(time=timestamp - timedelta(days=30), temperature=10)
+        Metric.objects.create(time=timestamp, temperature=20)
+
+        stats = Metric.timescale.filter(time__gte=timestamp - timedelta(days=1)).explain_chunks()
+
+        # verify, the older chunk is excluded
+        self.assertEqual(stats.chunks_scanned, 1)
+        self.assertEqual(stats.chunks_excluded, 1)
+        self.assertEqual(stats.rows, 1)
+
+    def test_explain_chunks_continuous_aggregate(self):
+        timestamp = timezone.now()
+        Metric.objects.create(time=timestamp - timedelta(days=30), temperature=10)
+        Metric.objects.create(time=timestamp, temperature=20)
+
+        stats = HourlyMetric.timescale.filter(bucket__gte=timestamp - timedelta(days=1)).explain_chunks()
+
+        # verify, the chunks of the hypertable behind the view are counted
+        self.assertGreaterEqual(stats.chunks_scanned, 1)
+        self.assertGreaterEqual(stats.chunks_excluded, 0)
+        self.assertGreaterEqual(stats.chunks_scanned + stats.chunks_excluded, 2)
+
+    def test_query_instrumentation(self):
+        timestamp = timezone.now()
+        Metric.objects.create(time=timestamp - timedelta(days=30), temperature=10)
+        Metric.objects.create(time=timestamp, temperature=20)
+
+        received = []
+
+        def receiver(sender, connection, stats, **kwargs):
+            received.append(stats)
+
+        query_instrumented.connect(receiver)
+        try:
+            with connection.execute_wrapper(QueryInstrumentation(explain_rate=1, tracing=False)):
+                list(Metric.timescale.filter(time__gte=timestamp - timedelta(days=1)))
+        finally:
+            query_instrumented.disconnect(receiver)
+
+        # verify
+        self.assertEqual(received[-1].rows, 1)
+        self.assertEqual((received[-1].chunks_scanned, received[-1].chunks_excluded), (1, 1))
+
+    def test_prepare(self):
+        timestamp = timezone.now().replace(minute=0, second=0, microsecond=0)
+        for hours in range(6):
+            Metric.objects.create(time=timestamp - timedelta(hours=hours), temperature=hours, device=hours % 2)
+
+        def build(queryset, start, end, device):
+            return (queryset
+                    .filter(time__range=(start, end), device=device)
+                    .time_bucket('time', '1 hour')
+                    .annotate(Avg('temperature')))
+
+        for server_side in (False, True):
+            prepared = Metric.timescale.prepare(build, server_side=server_side)
+            for hours, device in ((3, 0), (6, 1)):
+                arguments = {'start': timestamp - timedelta(hours=hours), 'end': timestamp, 'device': device}
+
+                # verify
+                self.assertEqual(prepared(**arguments), list(build(Metric.timescale.all(), **arguments)))
+
+    def test_histogram_array(self):
+        timestamp = timezone.now()
+        for temperature, device in ((1, 1), (5, 1), (10, 1), (15, 2), (30, 2)):
+            Metric.objects.create(time=timestamp, temperature=temperature, device=device)
+
+        histogram = Metric.timescale.histogram_array('temperature', edges=[0, 10, 20], group_by='device')
+
+        # verify, the value above the last edge is left out
+        self.assertEqual(histogram.groups, [1, 2])
+        self.assertEqual(histogram.counts.tolist(), [[2, 1], [0, 1]])
+
+        # integer columns are counted into the double precision edges as well
+        histogram = Metric.timescale.histogram_array('device', edges=[0, 1.5, 3])
+        self.assertEqual(histogram.counts.tolist(), [[3, 2]])
+
+    def test_time_bucket_gapfill_fill(self):
+        timestamp = timezone.now().replace(minute=0, second=0, microsecond=0)
+        Metric.objects.create(time=timestamp - timedelta(hours=3), temperature=10)
+        Metric.objects.create(time=timestamp - timedelta(hours=1), temperature=20)
+
+        metrics = (Metric.timescale
+                   .filter(time__range=(timestamp - timedelta(hours=3), timestamp))
+                   .time_bucket_gapfill('time', '1 hour', timestamp - timedelta(hours=3), timestamp,
+                                        annotations={'locf': Avg('temperature'), 'interpolated': Avg('temperature')},
+                                        fill={'locf': 'locf', 'interpolated': 'interpolate'})
+                   .order_by('bucket'))
+
+        # verify, the empty bucket between the two datapoints is filled
+        self.assertEqual(metrics[1]['locf'], 10.0)
+        self.assertEqual(metrics[1]['interpolated'], 15.0)
+
+        # a typo in the fill doesn't leave the gaps silently unfilled
+        with self.assertRaisesMessage(ValueError, 'unknown annotations: interpolate'):
+            Metric.timescale.time_bucket_gapfill('time', '1 hour', timestamp - timedelta(hours=3), timestamp,
+                                                 annotations={'interpolated': Avg('temperature')},
+                                                 fill={'interpolate': 'interpolate'})
+
+
+class AdvisorTests(TestCase):
+
+    def test_recommend_interval(self):
+        # a day of data per 100 MB, rounded down to a step
+        ingest_rate = 100 * 1024 ** 2 / timedelta(days=1).total_seconds()
+        self.assertEqual(recommend_interval(ingest_rate, 150 * 1024 ** 2), timedelta(days=1))
+        self.assertEqual(recommend_interval(ingest_rate, 1), timedelta(minutes=1))
+        self.assertEqual(recommend_interval(0, 1), timedelta(days=28))
+        self.assertEqual(format_interval(timedelta(hours=6)), '6 hours')
+
+    def test_advise_chunk_interval(self):
+        timestamp = timezone.now()
+        for days in range(2, 5):
+            Metric.objects.create(time=timestamp - timedelta(days=days), temperature=days)
+
+        advice = advise_chunk_interval(Metric, memory_fraction=0.5)
+
+        # verify, the memory fraction is shared by the hypertables
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_size_bytes(current_setting(%s))', ['shared_buffers'])
+            shared_buffers = cursor.fetchone()[0]
+            cursor.execute('SELECT COUNT(*) FROM timescaledb_information.hypertables')
+            hypertables = cursor.fetchone()[0]
+        self.assertEqual(advice.target_bytes, int(shared_buffers * 0.5 / hypertables))
+        self.assertEqual(advice.current_interval, '1 day')
+        self.assertGreater(advice.slice_bytes, 0)
+        self.assertIsNotNone(advice.recommended_interval)
+
+    def test_command(self):
+        Metric.objects.create(time=timezone.now() - timedelta(days=3), temperature=10)
+
+        out = StringIO()
+        call_command('advise_chunk_interval', 'metrics.Metric', stdout=out)
+
+        # verify
+        self.assertIn('metrics.Metric.time:', out.getvalue())
+        self.assertIn('recommended interval', out.getvalue())
+
+    def test_command_unknown_model(self):
+        with self.assertRaises(CommandError):
+            call_command('advise_chunk_interval', 'metrics.Unknown', stdout=StringIO())
+
+
+class ParallelTests(TransactionTestCase):
+    # the parts of a parallel query run on their own connections, so the data has to be committed
+
+    def test_parallel(self):
+        timestamp = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+        for hours in range(48):
+            Metric.objects.create(time=timestamp - timedelta(hours=hours), temperature=hours, device=hours % 2)
+
+        # split the two days at day boundaries, buckets spanning several parts are merged
+        metrics = (Metric.timescale
+                   .filter(time__range=(timestamp - timedelta(days=2), timestamp))
+                   .values('device', bucket=TimeBucket('time', '1 week'))
+                   .annotate(Avg('temperature'), Max('temperature'), temperature__first=First('temperature', 'time'))
+                   .order_by('bucket', 'device'))
+
+        # verify
+        self.assertEqual(metrics.parallel(workers=2, split='1 day'), list(metrics))
+
+
+class ContinuousAggregateTests(TransactionTestCase):
+    # continuous aggregates can't be refreshed inside a transaction
+
+    def setUp(self):
+        super().setUp()
+        # pause the refresh policy of migration 0006 so it doesn't refresh during the test
+        self.job_id = HourlyMetric.timescale.materialization_lag().job_id
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT alter_job(%s, scheduled => false)', [self.job_id])
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT alter_job(%s, scheduled => true)', [self.job_id])
+        super().tearDown()
+
+    def test_refresh(self):
+        # a window older than the start_offset of the policy
+        timestamp = timezone.now().replace(minute=0, second=0, microsecond=0) - relativedelta(days=10)
+        Metric.objects.create(time=timestamp + timedelta(minutes=10), temperature=10, device=1)
+
+        HourlyMetric.timescale.refresh(timestamp, timestamp + timedelta(hours=1))
+
+        # verify
+        self.assertGreaterEqual(HourlyMetric.timescale.watermark(), timestamp + timedelta(hours=1))
+        self.assertEqual(
+            list(HourlyMetric.timescale.materialized().filter(bucket=timestamp).values_list('bucket', 'avg_temperature')),
+            [(timestamp, 10.0)],
+        )
+
+        lag = HourlyMetric.timescale.materialization_lag()
+        self.assertIsNotNone(lag.job_id)
+        self.assertEqual(lag.schedule_interval, timedelta(hours=1))
+
+    def test_routing_skips_materialized_only(self):
+        metrics = Metric.timescale.time_bucket('time', '1 day').annotate(Max('temperature'))
+        self.assertIsNotNone(get_continuous_aggregate_route(metrics))
+
+        HourlyMetric.timescale.set_materialized_only(True)
+        try:
+            # verify, the newest buckets are missing from the rollup
+            self.assertIsNone(get_continuous_aggregate_route(metrics))
+        finally:
+            HourlyMetric.timescale.set_materialized_only(False)
+
+
+class Reading(models.Model):
+    time = models.DateTimeField()
+    sensor = models.IntegerField()
+    value = models.FloatField()
+
+    objects = models.Manager()
+    timescale = TimescaleManager()
+
+    class Meta:
+        app_label = 'metrics'
+        constraints = [models.UniqueConstraint(fields=['time', 'sensor'], name='reading_time_sensor')]
+
+
+class UpsertTests(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        with connection.schema_editor() as schema_editor:
+            schema_editor.create_model(Reading)
+
+    def test_upsert_many(self):
+        timestamp = timezone.now().replace(minute=0, second=0, microsecond=0)
+        Reading.objects.create(time=timestamp, sensor=1, value=1)
+
+        # the existing row is updated, of the duplicates within the rows the last one wins
+        rows = [(timestamp, 1, 2.0), (timestamp + timedelta(hours=1), 1, 3.0), (timestamp + timedelta(hours=1), 1, 4.0)]
+        upserted = Reading.timescale.upsert_many(rows, ('time', 'sensor'), columns=['time', 'sensor', 'value'])
+
+        # verify
+        self.assertEqual(upserted, 2)
+        self.assertEqual(list(Reading.objects.order_by('time').values_list('value', flat=True)), [2.0, 4.0])
+
+        # without update fields existing rows are left untouched
+        rows = [(timestamp, 1, 9.0), (timestamp + timedelta(hours=2), 1, 5.0)]
+        upserted = Reading.timescale.upsert_many(
+            rows, ('time', 'sensor'), update_fields=[], columns=['time', 'sensor', 'value']
+        )
+
+        # verify
+        self.assertEqual(upserted, 1)
+        self.assertEqual(list(Reading.objects.order_by('time').values_list('value', flat=True)), [2.0, 4.0, 5.0])
+
+        # the update fields have to be copied
+        with self.assertRaises(ValueError):
+            Reading.timescale.upsert_many(rows, ('time', 'sensor'), update_fields=['value'], columns=['time', 'sensor'])
+
+
+class Sample(models.Model):
+    time = models.DateTimeField()
+    tags = ArrayField(models.CharField(max_length=20), null=True)
+    matrix = ArrayField(ArrayField(models.FloatField(null=True)), null=True)
+    payload = models.BinaryField(null=True)
+
+    objects = models.Manager()
+    timescale = TimescaleManager()
+
+    class Meta:
+        app_label = 'metrics'
+
+
+class CopyFromTests(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        with connection.schema_editor() as schema_editor:
+            schema_editor.create_model(Sample)
+
+    def test_copy_arrays_and_binary(self):
+        timestamp = timezone.now()
+        rows = [
+            (timestamp, ['a "quoted", tag', 'back\\slash', None], [[1.0, 2.5], [None, -1.0]], b'\x00\xff"'),
+            (timestamp, None, None, None),
+        ]
+        copied = Sample.timescale.copy_from(rows, columns=['time', 'tags', 'matrix', 'payload'])
+
+        # verify
+        self.assertEqual(copied, 2)
+        samples = list(Sample.objects.order_by('tags').values_list('tags', 'matrix', 'payload'))
+        self.assertEqual(
+            [(tags, matrix, payload if payload is None else bytes(payload)) for tags, matrix, payload in samples],
+            [rows[0][1:], rows[1][1:]],
+        )
+
+
+class FreshTableMigrationTests(TransactionTestCase):
+    # every batch of the copy commits on its own
+
+    def setUp(self):
+        super().setUp()
+        with connection.schema_editor() as schema_editor:
+            schema_editor.create_model(Reading)
+
+    def tearDown(self):
+        with connection.schema_editor() as schema_editor:
+            schema_editor.delete_model(Reading)
+        super().tearDown()
+
+    @override_settings(TIMESCALE_MIGRATE_HYPERTABLE_WITH_FRESH_TABLE=True, TIMESCALE_MIGRATE_HYPERTABLE_BATCH_SIZE=2)
+    def test_migrate_with_fresh_table(self):
+        timestamp = timezone.now().replace(minute=0, second=0, microsecond=0)
+        for hours in range(4):
+            Reading.objects.create(time=timestamp + timedelta(hours=hours), sensor=1, value=hours)
+
+        # writes between the batches, to rows already copied and older than them
+        written = []
+
+        def write_during_copy(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            if not written and sql.startswith('INSERT INTO "metrics_reading_fresh"'):
+                written.append(sql)
+                Reading.objects.filter(time=timestamp).update(value=10)
+                Reading.objects.filter(time=timestamp + timedelta(hours=1)).delete()
+                Reading.objects.create(time=timestamp - timedelta(hours=1), sensor=1, value=-1)
+            return result
+
+        new_field = TimescaleDateTimeField(interval='1 day')
+        new_field.set_attributes_from_name('time')
+        new_field.model = Reading
+        with connection.execute_wrapper(write_during_copy), connection.schema_editor(atomic=False) as schema_editor:
+            schema_editor.alter_field(Reading, Reading._meta.get_field('time'), new_field)
+
+        # verify
+        self.assertTrue(written)
+        self.assertEqual(
+            list(Reading.objects.order_by('time').values_list('value', flat=True)), [-1.0, 10.0, 2.0, 3.0]
+        )
+        with self.assertRaises(IntegrityError):
+            Reading.objects.create(time=timestamp, sensor=1, value=0)
+
+
+class PartitionedReading(models.Model):
+    time = TimescaleDateTimeField(
+        interval='1 day', partitioning_column='sensor', number_partitions=4, composite_primary_key=('time', 'sensor')
+    )
+    sensor = models.IntegerField()
+    value = models.FloatField()
+
+    class Meta:
+        app_label = 'metrics'
+
+
+class SpacePartitioningTests(TestCase):
+    sql_dimensions = (
+        'SELECT column_name, num_partitions FROM timescaledb_information.dimensions '
+        'WHERE hypertable_name = %s ORDER BY dimension_number'
+    )
+
+    sql_primary_key_columns = (
+        'SELECT attname FROM pg_index JOIN pg_attribute ON attrelid = indrelid AND attnum = ANY(indkey) '
+        'WHERE indrelid = %s::regclass AND indisprimary'
+    )
+
+    def setUp(self):
+        super().setUp()
+        with connection.schema_editor() as schema_editor:
+            schema_editor.create_model(PartitionedReading)
+
+    def get_dimensions(self):
+        with connection.cursor() as cursor:
+            cursor.execute(self.sql_dimensions, [PartitionedReading._meta.db_table])
+            return cursor.fetchall()
+
+    def test_space_partitioning(self):
+        self.assertEqual(self.get_dimensions(), [('time', None), ('sensor', 4)])
+
+        new_field = TimescaleDateTimeField(
+            interval='1 day', partitioning_column='sensor', number_partitions=8,
+            composite_primary_key=('time', 'sensor'),
+        )
+        new_field.set_attributes_from_name('time')
+        new_field.model = PartitionedReading
+        with connection.schema_editor() as schema_editor:
+            schema_editor.alter_field(PartitionedReading, PartitionedReading._meta.get_field('time'), new_field)
+
+        # verify
+        self.assertEqual(self.get_dimensions(), [('time', None), ('sensor', 8)])
+
+    def test_composite_primary_key(self):
+        with connection.cursor() as cursor:
+            cursor.execute(self.sql_primary_key_columns, [PartitionedReading._meta.db_table])
+            self.assertEqual({column for column, in cursor.fetchall()}, {'time', 'sensor'})
+
+        # verify, the rows are unique per time and sensor instead of per id
+        timestamp = timezone.now()
+        PartitionedReading.objects.create(time=timestamp, sensor=1, value=1)
+        PartitionedReading.objects.create(time=timestamp, sensor=2, value=1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PartitionedReading.objects.create(time=timestamp, sensor=1, value=2)
+
+
+class HypertableIndexTests(TransactionTestCase):
+    # transaction_per_chunk can't be used inside a transaction
+
+    def test_transaction_per_chunk(self):
+        index = HypertableIndex(fields=['device', '-time'], name='metric_device_time_idx')
+
+        # inside a transaction the index is built like a regular index
+        with connection.schema_editor() as schema_editor:
+            self.assertNotIn('transaction_per_chunk', str(index.create_sql(Metric, schema_editor)))
+
+        with connection.schema_editor(atomic=False) as schema_editor:
+            self.assertIn('WITH (timescaledb.transaction_per_chunk)', str(index.create_sql(Metric, schema_editor)))
+            schema_editor.add_index(Metric, index)
+        try:
+            # verify
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT indexdef FROM pg_indexes WHERE indexname = %s', [index.name])
+                self.assertIn('(device, "time" DESC)', cursor.fetchone()[0])
+        finally:
+            with connection.schema_editor(atomic=False) as schema_editor:
+                schema_editor.remove_index(Metric, index)
+
+
+class ToolkitTests(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'timescaledb_toolkit'")
+            if cursor.fetchone() is None:
+                self.skipTest('The timescaledb_toolkit extension is not available.')
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS timescaledb_toolkit')
+
+        self.timestamp = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+        for device in (1, 2):
+            for hours in range(10):
+                Metric.objects.create(
+                    time=self.timestamp + timedelta(hours=hours), temperature=hours * device, device=device
+                )
+
+    def test_lttb(self):
+        points = list(Metric.timescale.filter(device=1).lttb('time', 'temperature', 3))
+
+        # verify, the first and last points are always kept
+        self.assertEqual(len(points), 3)
+        self.assertEqual(points[0]['lttb_t'], self.timestamp)
+        self.assertEqual(points[-1]['lttb_t'], self.timestamp + timedelta(hours=9))
+
+    def test_downsample(self):
+        points = Metric.timescale.filter(device=1).downsample('time', 'temperature', 3)
+
+        # verify, the same points as lttb
+        self.assertEqual(
+            [(point['time'], point['temperature']) for point in points],
+            [(point['lttb_t'], point['lttb_v']) for point in Metric.timescale.filter(device=1).lttb(
+                'time', 'temperature', 3
+            )],
+        )
+
+        points = Metric.timescale.downsample('time', 'temperature', 3, partition_by=['device'])
+
+        # verify, every device is downsampled on its own
+        self.assertEqual([point['device'] for point in points], [1, 1, 1, 2, 2, 2])
+        self.assertEqual(
+            [(point['time'], point['temperature']) for point in points if point['time'] == self.timestamp],
+            [(self.timestamp, 0.0), (self.timestamp, 0.0)],
+        )
+        self.assertEqual(
+            [point['temperature'] for point in points if point['time'] == self.timestamp + timedelta(hours=9)],
+            [9.0, 18.0],
+        )
+        self.assertEqual(Metric.timescale.none().downsample('time', 'temperature', 3), [])
+
+    def test_aggregates(self):
+        result = Metric.timescale.filter(device=1).aggregate(
+            median=ApproxPercentile(0.5, PercentileAgg('temperature')),
+            average=Average(StatsAgg('temperature')),
+            stddev=StatsStdDev(StatsAgg('temperature')),
+            num_vals=NumVals(StatsAgg('temperature')),
+            delta=Delta(CounterAgg('time', 'temperature')),
+            rate=Rate(CounterAgg('time', 'temperature')),
+            time_weighted=Average(TimeWeight('time', 'temperature')),
+        )
+
+        # verify, the temperatures of device 1 rise linearly from 0 to 9 over 9 hours
+        self.assertAlmostEqual(result['median'], 4.5, delta=1)
+        self.assertAlmostEqual(result['average'], 4.5)
+        self.assertAlmostEqual(result['stddev'], 3.0277, places=3)
+        self.assertEqual(result['num_vals'], 10)
+        self.assertAlmostEqual(result['delta'], 9.0)
+        self.assertAlmostEqual(result['rate'], 9.0 / (9 * 3600))
+        self.assertAlmostEqual(result['time_weighted'], 4.5)
+
+    def test_rollup(self):
+        # the aggregates per device are combined without rescanning the rows
+        result = Metric.timescale.values('device').annotate(stats=StatsAgg('temperature')).aggregate(
+            average=Average(Rollup('stats')), num_vals=NumVals(Rollup('stats'))
+        )
+
+        # verify
+        self.assertAlmostEqual(result['average'], 6.75)
+        self.assertEqual(result['num_vals'], 20)
+
+
+class AsyncTests(TransactionTestCase):
+    # the native async connections don't see the data of a test transaction
+
+    async def test_acopy_from_and_ato_list(self):
+        timestamp = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+        rows = [(timestamp - timedelta(hours=hours), float(hours), 0) for hours in range(3)]
+        copied = await Metric.timescale.acopy_from(rows, columns=['time', 'temperature', 'device'])
+
+        metrics = (Metric.timescale
+                   .filter(time__gte=timestamp - timedelta(hours=3))
+                   .time_bucket('time', '1 hour')
+                   .annotate(Avg('temperature'))
+                   .order_by('bucket'))
+
+        # verify
+        self.assertEqual(copied, 3)
+        self.assertEqual(await metrics.ato_list(), await sync_to_async(list)(metrics))
+        self.assertEqual(
+            await metrics.ato_list(normalise_datetimes=True),
+            await sync_to_async(metrics.to_list)(normalise_datetimes=True),
+        )
+
+    async def test_astream(self):
+        timestamp = timezone.now().replace(minute=0, second=0, microsecond=0)
+        for hours in range(3):
+            await sync_to_async(Metric.objects.create)(time=timestamp - timedelta(hours=hours), temperature=hours)
+
+        metrics = (Metric.timescale
+                   .filter(time__gte=timestamp - timedelta(hours=3))
+                   .time_bucket('time', '1 hour')
+                   .annotate(Avg('temperature'))
+                   .order_by('bucket'))
+        batches = [batch async for batch in metrics.astream(chunk_size=2, batches=True)]
+
+        # verify, the second stream reuses the idle connection of the first
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        self.assertEqual(batches[0] + batches[1], [row async for row in metrics.astream()])
+
+    @skipUnless(has_native_async(), "Copying from an async iterable requires psycopg 3.")
+    async def test_acopy_from_async_iterable(self):
+        timestamp = timezone.now()
+
+        async def rows():
+            for minutes in range(5):
+                yield {'time': timestamp - timedelta(minutes=minutes), 'temperature': minutes, 'device': 1}
+
+        copied = await Metric.timescale.acopy_from(rows(), columns=['time', 'temperature', 'device'], batch_rows=2)
+
+        # verify
+        self.assertEqual(copied, 5)
+        self.assertEqual(await sync_to_async(Metric.objects.filter(device=1).count)(), 5)
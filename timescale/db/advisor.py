@@ -0,0 +1,131 @@
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import connections, router
+
+from timescale.db.models.indexes import HypertableIndex
+from timescale.db.models.utils import get_time_field, parse_interval
+
+
+# recent chunks of all hypertables should fit into a quarter of the memory, each hypertable gets an equal share
+DEFAULT_MEMORY_FRACTION = 0.25
+
+# the closed time slices the ingest rate is measured on
+DEFAULT_SAMPLE_CHUNKS = 5
+
+# recommendations are rounded down to one of these
+INTERVAL_STEPS = (
+    '1 minute', '5 minutes', '15 minutes', '30 minutes',
+    '1 hour', '2 hours', '3 hours', '6 hours', '12 hours',
+    '1 day', '2 days', '7 days', '14 days', '28 days',
+)
+
+sql_shared_buffers = "SELECT pg_size_bytes(current_setting('shared_buffers'))"
+
+sql_count_hypertables = 'SELECT COUNT(*) FROM timescaledb_information.hypertables'
+
+# sizes include indexes and TOAST, space partitions of a time slice are summed
+sql_recent_time_slices = '''
+    SELECT range_start, range_end, SUM(pg_total_relation_size(format('%%I.%%I', chunk_schema, chunk_name)::regclass))
+    FROM timescaledb_information.chunks
+    WHERE hypertable_name = %s AND range_end <= now() AND NOT is_compressed
+    GROUP BY range_start, range_end
+    ORDER BY range_start DESC
+    LIMIT %s
+'''
+
+ChunkIntervalAdvice = namedtuple('ChunkIntervalAdvice', [
+    'model', 'field', 'current_interval', 'recommended_interval', 'slice_bytes', 'ingest_rate', 'target_bytes',
+])
+ChunkIntervalAdvice.__doc__ = """
+The chunk_time_interval recommended for a hypertable. `slice_bytes` is the
+average size of a closed time slice (all chunks of an interval, including
+indexes), `ingest_rate` the bytes written per second and `target_bytes` the
+size recent chunks should stay within. `recommended_interval` is None when
+there are no closed chunks to measure.
+"""
+
+
+def format_interval(interval: timedelta) -> str:
+    """
+    Format a timedelta as an interval for `TimescaleDateTimeField`, e.g
+    '6 hours' or '7 days'.
+    """
+    seconds = int(interval.total_seconds())
+    for unit, length in (('day', 86400), ('hour', 3600), ('minute', 60), ('second', 1)):
+        if seconds % length == 0:
+            count = seconds // length
+            return '%d %s%s' % (count, unit, '' if count == 1 else 's')
+
+
+def recommend_interval(ingest_rate, target_bytes):
+    """
+    Round the interval that fills `target_bytes` at the ingest rate down to a
+    step of `INTERVAL_STEPS`.
+    """
+    steps = [parse_interval(step) for step in INTERVAL_STEPS]
+    if not ingest_rate:
+        return steps[-1]
+    ideal = timedelta(seconds=target_bytes / ingest_rate)
+    return max((step for step in steps if step <= ideal), default=steps[0])
+
+
+def advise_chunk_interval(model, memory_fraction=DEFAULT_MEMORY_FRACTION, sample_chunks=DEFAULT_SAMPLE_CHUNKS,
+                          using=None):
+    """
+    Recommend a chunk_time_interval for the hypertable of the model, keeping a
+    time slice of chunks within its share of `memory_fraction` of
+    shared_buffers at the ingest rate of the most recent closed chunks. The
+    fraction is shared equally by all hypertables of the database.
+    """
+    field = get_time_field(model)
+    if field is None:
+        raise ValueError("%s has no TimescaleDateTimeField." % model._meta.label)
+
+    connection = connections[using or router.db_for_read(model)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql_shared_buffers)
+        shared_buffers = cursor.fetchone()[0]
+        cursor.execute(sql_count_hypertables)
+        target_bytes = int(shared_buffers * memory_fraction / max(cursor.fetchone()[0], 1))
+
+        cursor.execute(sql_recent_time_slices, [model._meta.db_table, sample_chunks])
+        slices = cursor.fetchall()
+
+    if not slices:
+        return ChunkIntervalAdvice(model, field, field.interval, None, None, None, target_bytes)
+
+    slice_bytes = sum(size for start, end, size in slices) / len(slices)
+    seconds = sum((end - start).total_seconds() for start, end, size in slices)
+    ingest_rate = sum(size for start, end, size in slices) / seconds
+
+    return ChunkIntervalAdvice(
+        model, field, field.interval, recommend_interval(ingest_rate, target_bytes), int(slice_bytes),
+        ingest_rate, target_bytes,
+    )
+
+
+def recommend_indexes(model):
+    """
+    Recommend composite (column, time DESC) indexes for the columns queries on
+    the hypertable are usually filtered on, the compression segment by
+    columns and the space partitioning column. Columns already leading an
+    index with the time column are skipped.
+    """
+    field = get_time_field(model)
+    if field is None:
+        raise ValueError("%s has no TimescaleDateTimeField." % model._meta.label)
+
+    covered = {
+        tuple(name.lstrip('-') for name in index.fields[:2]) for index in model._meta.indexes
+    }
+
+    indexes = []
+    for name in (*(field.compress_segmentby or ()), field.partitioning_column):
+        if name is None or (name, field.name) in covered:
+            continue
+        covered.add((name, field.name))
+        index = HypertableIndex(fields=[name, '-' + field.name])
+        index.set_name_with_model(model)
+        indexes.append(index)
+    return indexes
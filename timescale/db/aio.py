@@ -0,0 +1,156 @@
+import asyncio
+from contextlib import asynccontextmanager
+from uuid import uuid4
+from weakref import WeakKeyDictionary
+
+from django.core.exceptions import EmptyResultSet
+
+from timescale.db.copy import (
+    COPY_FORMATS, _csv_batch, _iter_batches, get_copy_fields, is_psycopg3, sql_copy_from, sql_copy_types,
+)
+
+if is_psycopg3:
+    import psycopg
+else:
+    psycopg = None
+
+# idle connections kept per event loop and database alias
+MAX_IDLE_CONNECTIONS = 4
+
+_idle_connections = WeakKeyDictionary()
+
+
+def has_native_async():
+    """
+    Native async queries need psycopg 3, with psycopg2 the async methods fall
+    back to running the sync ones in a thread.
+    """
+    return psycopg is not None
+
+
+async def _open(connection):
+    params = connection.get_connection_params()
+    server_side_binding = connection.settings_dict['OPTIONS'].get('server_side_binding') is True
+    params['cursor_factory'] = psycopg.AsyncCursor if server_side_binding else psycopg.AsyncClientCursor
+
+    conn = await psycopg.AsyncConnection.connect(autocommit=True, **params)
+    if connection.timezone_name:
+        await conn.execute("SELECT set_config('TimeZone', %s, false)", [connection.timezone_name])
+    return conn
+
+
+def _is_reusable(conn):
+    return not conn.closed and conn.info.transaction_status == psycopg.pq.TransactionStatus.IDLE
+
+
+@asynccontextmanager
+async def connect(connection):
+    """
+    Get a psycopg `AsyncConnection` configured like the given Django
+    connection. The Django connection itself is never used, it is bound to a
+    thread. Up to `MAX_IDLE_CONNECTIONS` connections are kept open for reuse
+    by the event loop, a connection is closed when its block raises.
+    """
+    idle = _idle_connections.setdefault(asyncio.get_running_loop(), {}).setdefault(connection.alias, [])
+    conn = None
+    while idle and conn is None:
+        conn = idle.pop()
+        if not _is_reusable(conn):
+            await conn.close()
+            conn = None
+    if conn is None:
+        conn = await _open(connection)
+
+    try:
+        yield conn
+    except BaseException:
+        await conn.close()
+        raise
+    if _is_reusable(conn) and len(idle) < MAX_IDLE_CONNECTIONS:
+        idle.append(conn)
+    else:
+        await conn.close()
+
+
+async def aiter_values(connection, compiler, names, chunk_size):
+    """
+    Execute the compiled values query on a native async connection and yield
+    the result rows as dicts, fetching `chunk_size` rows at a time from a
+    server-side cursor.
+    """
+    try:
+        sql, params = compiler.as_sql()
+    except EmptyResultSet:
+        return
+
+    expressions = [expression for expression, sql_params, alias in compiler.select[:compiler.col_count]]
+    converters = compiler.get_converters(expressions)
+
+    async with connect(connection) as conn:
+        # named cursors bind server-side, so the parameters are bound here
+        sql = psycopg.AsyncClientCursor(conn).mogrify(sql, params)
+        async with conn.transaction():
+            async with conn.cursor(name='timescale_%s' % uuid4().hex) as cursor:
+                await cursor.execute(sql)
+                while True:
+                    rows = await cursor.fetchmany(chunk_size)
+                    if not rows:
+                        return
+                    if converters:
+                        rows = compiler.apply_converters(rows, converters)
+                    for row in rows:
+                        yield dict(zip(names, row))
+
+
+async def _aiter_batches(rows, fields, batch_rows, connection):
+    if not hasattr(rows, '__aiter__'):
+        for batch in _iter_batches(rows, fields, batch_rows, connection):
+            yield batch
+        return
+
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_rows:
+            yield next(_iter_batches(batch, fields, batch_rows, connection))
+            batch = []
+    if batch:
+        yield next(_iter_batches(batch, fields, batch_rows, connection))
+
+
+async def acopy_rows(connection, model, rows, columns=None, batch_rows=10000, format='csv', table=None):
+    """
+    Async counterpart of `copy_rows` on a native async connection. Rows can
+    also be an async iterable.
+    """
+    if format not in COPY_FORMATS:
+        raise ValueError("format must be one of %s." % ', '.join(COPY_FORMATS))
+
+    if columns is None and hasattr(rows, 'columns'):
+        columns = list(rows.columns)
+    fields = get_copy_fields(model, columns)
+    sql = sql_copy_from.format(
+        table=connection.ops.quote_name(table or model._meta.db_table),
+        columns=', '.join(connection.ops.quote_name(field.column) for field in fields),
+        format=format,
+    )
+
+    count = 0
+    async with connect(connection) as conn:
+        async with conn.transaction():
+            async with conn.cursor() as cursor:
+                types = None
+                if format == 'binary':
+                    await cursor.execute(sql_copy_types, [[field.cast_db_type(connection) for field in fields]])
+                    types = [row[0] for row in await cursor.fetchall()]
+                async with cursor.copy(sql) as copy:
+                    if types is not None:
+                        copy.set_types(types)
+                    async for batch in _aiter_batches(rows, fields, batch_rows, connection):
+                        if format == 'binary':
+                            for row in batch:
+                                await copy.write_row(row)
+                        else:
+                            await copy.write(_csv_batch(fields, batch))
+                        count += len(batch)
+    return count
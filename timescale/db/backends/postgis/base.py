@@ -1,10 +1,12 @@
 import logging
 
+from django.conf import settings
 from django.db import ProgrammingError
 from django.core.exceptions import ImproperlyConfigured
 
 from timescale.db.backends.postgis import base_impl
 from timescale.db.backends.postgis.schema import TimescaleSchemaEditor
+from timescale.db.instrumentation import QueryInstrumentation
 
 
 logger = logging.getLogger(__name__)
@@ -13,6 +15,13 @@ logger = logging.getLogger(__name__)
 class DatabaseWrapper(base_impl.backend()):
     SchemaEditorClass = TimescaleSchemaEditor
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if getattr(settings, 'TIMESCALE_INSTRUMENT_QUERIES', False):
+            self.execute_wrappers.append(
+                QueryInstrumentation(explain_rate=getattr(settings, 'TIMESCALE_INSTRUMENT_EXPLAIN_RATE', 0.0))
+            )
+
     def prepare_database(self):
         """Prepare the configured database.
         This is where we enable the `timescaledb` extension
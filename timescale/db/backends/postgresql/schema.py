@@ -1,7 +1,14 @@
+import logging
+
 from django.conf import settings
+from django.db import NotSupportedError, transaction
+from django.db.models import CheckConstraint, UniqueConstraint
 from django.db.backends.postgresql.schema import DatabaseSchemaEditor
 
 from timescale.db.models.fields import TimescaleDateTimeField
+from timescale.db.models.indexes import HypertableIndex
+
+logger = logging.getLogger('timescale.db.backends.schema')
 
 
 class TimescaleSchemaEditor(DatabaseSchemaEditor):
@@ -29,19 +36,115 @@ class TimescaleSchemaEditor(DatabaseSchemaEditor):
             'END; $do$'
     )
 
-    sql_drop_primary_key = 'ALTER TABLE {table} DROP CONSTRAINT {pkey}'
+    sql_drop_primary_key = 'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {pkey}'
+
+    sql_add_primary_key = (
+        'DO $do$ BEGIN '
+        'IF NOT EXISTS ('
+        "SELECT 1 FROM pg_constraint WHERE conrelid = {table_name}::regclass AND contype = 'p'"
+        ') '
+        'THEN ALTER TABLE {table} ADD CONSTRAINT {pkey} PRIMARY KEY ({columns}); '
+        'END IF;'
+        'END; $do$'
+    )
+
+    sql_rename_primary_key = 'ALTER TABLE {table} RENAME CONSTRAINT {old_pkey} TO {pkey}'
 
     sql_add_hypertable = (
         "SELECT create_hypertable("
         "{table}, {partition_column}, "
+        "{space_partitioning}"
         "chunk_time_interval => interval {interval}, "
-        "migrate_data => {migrate})"
+        "migrate_data => {migrate}, "
+        "if_not_exists => {if_not_exists})"
+    )
+
+    sql_space_partitioning = "partitioning_column => {partitioning_column}, number_partitions => {number_partitions}, "
+
+    sql_add_dimension = 'SELECT add_dimension({table}, {partitioning_column}, number_partitions => {number_partitions})'
+
+    sql_set_number_partitions = 'SELECT set_number_partitions({table}, {number_partitions}, {partitioning_column})'
+
+    sql_create_fresh_table = (
+        'CREATE TABLE IF NOT EXISTS {fresh_table} '
+        '(LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY INCLUDING STORAGE)'
+    )
+
+    sql_copy_fresh_batch = (
+        'INSERT INTO {fresh_table} SELECT * FROM {table} '
+        'WHERE {condition} AND {column} <= ('
+        'SELECT max({column}) FROM ('
+        'SELECT {column} FROM {table} WHERE {condition} ORDER BY {column} LIMIT {batch_size}'
+        ') AS batch)'
+    )
+
+    sql_create_fresh_log = 'CREATE TABLE IF NOT EXISTS {log_table} AS SELECT {column} FROM {table} WITH NO DATA'
+
+    sql_create_fresh_capture = (
+        'CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN '
+        "IF TG_OP <> 'INSERT' THEN INSERT INTO {log_table} VALUES (OLD.{column}); END IF; "
+        "IF TG_OP <> 'DELETE' THEN INSERT INTO {log_table} VALUES (NEW.{column}); END IF; "
+        'RETURN NULL; END $$; '
+        'DROP TRIGGER IF EXISTS {trigger} ON {table}; '
+        'CREATE TRIGGER {trigger} AFTER INSERT OR UPDATE OR DELETE ON {table} '
+        'FOR EACH ROW EXECUTE FUNCTION {function}()'
+    )
+
+    sql_delete_fresh_changed = 'DELETE FROM {fresh_table} WHERE {column} IN (SELECT {column} FROM {log_table})'
+
+    sql_copy_fresh_remainder = (
+        'INSERT INTO {fresh_table} SELECT * FROM {table} '
+        'WHERE {condition} OR {column} IN (SELECT {column} FROM {log_table})'
     )
 
+    sql_drop_fresh_capture = 'DROP FUNCTION IF EXISTS {function}() CASCADE; DROP TABLE IF EXISTS {log_table}'
+
+    sql_fresh_watermark = 'SELECT max({column}) FROM {fresh_table}'
+
+    sql_lock_table = 'LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE'
+
+    sql_serial_sequence = 'SELECT pg_get_serial_sequence({table}, {column})'
+
+    sql_set_sequence_owner = 'ALTER SEQUENCE {sequence} OWNED BY {fresh_table}.{column}'
+
+    sql_reset_sequence = (
+        'SELECT setval({sequence}, COALESCE((SELECT max({column}) FROM {table}), 0) + 1, false)'
+    )
+
+    sql_swap_fresh_table = 'DROP TABLE {table}; ALTER TABLE {fresh_table} RENAME TO {table}'
+
     sql_set_chunk_time_interval = 'SELECT set_chunk_time_interval({table}, interval {interval})'
 
     sql_hypertable_is_in_schema = '''hypertable_schema = {schema_name}'''
 
+    sql_set_compression = 'ALTER TABLE {table} SET ({options})'
+
+    sql_add_compression_policy = 'SELECT add_compression_policy({table}, interval {compress_after})'
+
+    sql_remove_compression_policy = 'SELECT remove_compression_policy({table}, if_exists => true)'
+
+    sql_add_retention_policy = 'SELECT add_retention_policy({table}, interval {drop_after})'
+
+    sql_remove_retention_policy = 'SELECT remove_retention_policy({table}, if_exists => true)'
+
+    sql_create_continuous_aggregate = (
+        "CREATE MATERIALIZED VIEW {view} "
+        "WITH (timescaledb.continuous, timescaledb.materialized_only = {materialized_only}) AS {definition} "
+        "WITH NO DATA"
+    )
+
+    sql_delete_continuous_aggregate = 'DROP MATERIALIZED VIEW {view}'
+
+    sql_add_continuous_aggregate_policy = (
+        "SELECT add_continuous_aggregate_policy("
+        "{view}, "
+        "start_offset => {start_offset}, "
+        "end_offset => {end_offset}, "
+        "schedule_interval => interval {schedule_interval})"
+    )
+
+    sql_remove_continuous_aggregate_policy = 'SELECT remove_continuous_aggregate_policy({view})'
+
     def _assert_is_hypertable(self, model):
         """
         Assert if the table is a hyper table
@@ -70,6 +173,10 @@ class TimescaleSchemaEditor(DatabaseSchemaEditor):
 
         self.execute(sql)
 
+    def _primary_key_name(self, db_table):
+        pkey_length = self.connection.ops.max_name_length()
+        return self.quote_name(f'{db_table[:pkey_length - 5]}_pkey')
+
     def _drop_primary_key(self, model):
         """
         Hypertables can't partition if the primary key is not
@@ -78,13 +185,29 @@ class TimescaleSchemaEditor(DatabaseSchemaEditor):
         """
         db_table = model._meta.db_table
         table = self.quote_name(db_table)
-        pkey_length = self.connection.ops.max_name_length()
-        pkey = self.quote_name(f'{db_table[:pkey_length - 5]}_pkey')
+        pkey = self._primary_key_name(db_table)
 
         sql = self.sql_drop_primary_key.format(table=table, pkey=pkey)
 
         self.execute(sql)
 
+    def _add_primary_key(self, model, field, db_table=None):
+        """
+        Add the composite primary key of the field, which includes the
+        partitioning columns, if the table has none
+        """
+        db_table = db_table or model._meta.db_table
+        table = self.quote_name(db_table)
+        pkey = self._primary_key_name(db_table)
+        columns = ', '.join(
+            self.quote_name(model._meta.get_field(name).column) for name in field.primary_key_fields
+        )
+
+        sql = self.sql_add_primary_key.format(
+            table_name=self.quote_value(table), table=table, pkey=pkey, columns=columns
+        )
+        self.execute(sql)
+
     def _create_hypertable(self, model, field, should_migrate=False):
         """
         Create the hypertable with the partition column being the field.
@@ -100,15 +223,189 @@ class TimescaleSchemaEditor(DatabaseSchemaEditor):
         table = self.quote_value(model._meta.db_table)
         migrate = "true" if should_migrate else "false"
 
+        space_partitioning = ''
+        if field.partitioning_column is not None:
+            space_partitioning = self.sql_space_partitioning.format(
+                partitioning_column=self.quote_value(model._meta.get_field(field.partitioning_column).column),
+                number_partitions=int(field.number_partitions),
+            )
+
         if should_migrate and getattr(settings, "TIMESCALE_MIGRATE_HYPERTABLE_WITH_FRESH_TABLE", False):
-            # TODO migrate with fresh table [https://github.com/schlunsen/django-timescaledb/issues/16]
-            raise NotImplementedError()
+            fresh_table = self._fresh_table_name(model)
+            self.execute(self.sql_create_fresh_table.format(
+                fresh_table=self.quote_name(fresh_table), table=self.quote_name(model._meta.db_table)
+            ))
+            # a previous, interrupted migration may have created the hypertable already
+            sql = self.sql_add_hypertable.format(
+                table=self.quote_value(fresh_table), partition_column=partition_column,
+                space_partitioning=space_partitioning, interval=interval, migrate="false", if_not_exists="true"
+            )
+            self.execute(sql)
+            if field.composite_primary_key:
+                self._add_primary_key(model, field, fresh_table)
+            self._migrate_to_fresh_table(model, field, fresh_table)
         else:
+            if field.composite_primary_key:
+                self._add_primary_key(model, field)
             sql = self.sql_add_hypertable.format(
-                table=table, partition_column=partition_column, interval=interval, migrate=migrate
+                table=table, partition_column=partition_column, space_partitioning=space_partitioning,
+                interval=interval, migrate=migrate, if_not_exists="false"
             )
             self.execute(sql)
 
+        if field.compressed:
+            self._set_compression(model, field)
+            if field.compress_after is not None:
+                self._add_compression_policy(model, field)
+
+        if field.drop_after is not None:
+            self._add_retention_policy(model, field)
+
+    def _fresh_table_name(self, model, suffix='_fresh'):
+        db_table = model._meta.db_table
+        max_length = self.connection.ops.max_name_length()
+        return f'{db_table[:max_length - len(suffix)]}{suffix}'
+
+    def _migrate_to_fresh_table(self, model, field, fresh_table):
+        """
+        Copy the rows of the table into the fresh hypertable in batches of
+        `TIMESCALE_MIGRATE_HYPERTABLE_BATCH_SIZE` rows ordered by the partition
+        column, then swap the tables.
+
+        Outside of an atomic migration (`atomic = False`) every batch commits
+        on its own, the table stays available and an interrupted migration
+        resumes from the rows already copied. Only the cutover, copying the
+        rows written meanwhile and renaming the hypertable, locks the table.
+
+        A trigger logs the partition column of the rows inserted, updated or
+        deleted during the copy (TRUNCATE isn't captured), the cutover copies
+        the rows at those times again.
+        """
+        if self.collect_sql:
+            raise NotSupportedError("Migrating a hypertable with a fresh table can't be collected as SQL.")
+
+        table = self.quote_name(model._meta.db_table)
+        quoted_fresh_table = self.quote_name(fresh_table)
+        column = self.quote_name(field.column)
+        batch_size = int(getattr(settings, "TIMESCALE_MIGRATE_HYPERTABLE_BATCH_SIZE", 100000))
+        if self.connection.in_atomic_block:
+            logger.warning(
+                "Migrating %s to a hypertable inside a transaction, it can't be resumed and keeps the table "
+                "locked. Set atomic = False on the migration to copy in separate transactions.", model._meta.db_table
+            )
+
+        log_table = self.quote_name(self._fresh_table_name(model, '_fresh_log'))
+        capture = self.quote_name(self._fresh_table_name(model, '_fresh_capture'))
+        with transaction.atomic(using=self.connection.alias):
+            self.execute(self.sql_create_fresh_log.format(log_table=log_table, table=table, column=column))
+            self.execute(self.sql_create_fresh_capture.format(
+                function=capture, trigger=capture, log_table=log_table, table=table, column=column
+            ))
+
+        copied = 0
+        while True:
+            with transaction.atomic(using=self.connection.alias), self.connection.cursor() as cursor:
+                watermark = self._fresh_watermark(cursor, field, fresh_table)
+                condition, params = self._fresh_condition(column, watermark)
+                cursor.execute(self.sql_copy_fresh_batch.format(
+                    fresh_table=quoted_fresh_table, table=table, column=column, condition=condition,
+                    batch_size=batch_size,
+                ), params * 2)
+                if cursor.rowcount <= 0:
+                    break
+                copied += cursor.rowcount
+                watermark = self._fresh_watermark(cursor, field, fresh_table)
+            logger.info("Copied %d rows of %s into %s, up to %s", copied, model._meta.db_table, fresh_table, watermark)
+
+        with transaction.atomic(using=self.connection.alias), self.connection.cursor() as cursor:
+            cursor.execute(self.sql_lock_table.format(table=table))
+            watermark = self._fresh_watermark(cursor, field, fresh_table)
+            condition, params = self._fresh_condition(column, watermark)
+            cursor.execute(self.sql_delete_fresh_changed.format(
+                fresh_table=quoted_fresh_table, column=column, log_table=log_table
+            ))
+            cursor.execute(self.sql_copy_fresh_remainder.format(
+                fresh_table=quoted_fresh_table, table=table, column=column, condition=condition, log_table=log_table
+            ), params)
+            logger.info("Copied %d rows of %s written during the migration", max(cursor.rowcount, 0),
+                        model._meta.db_table)
+            self.execute(self.sql_drop_fresh_capture.format(function=capture, log_table=log_table))
+
+            self._move_sequences(cursor, model, fresh_table)
+            self.execute(self.sql_swap_fresh_table.format(table=table, fresh_table=quoted_fresh_table))
+            if field.composite_primary_key:
+                self.execute(self.sql_rename_primary_key.format(
+                    table=table, old_pkey=self._primary_key_name(fresh_table),
+                    pkey=self._primary_key_name(model._meta.db_table),
+                ))
+
+            # foreign keys, unique constraints and indexes aren't copied by LIKE, the hypertable gets them
+            # once filled
+            for fk_field in model._meta.local_concrete_fields:
+                if fk_field.remote_field and fk_field.db_constraint:
+                    self.execute(self._create_fk_sql(model, fk_field, "_fk_%(to_table)s_%(to_column)s"))
+            for constraint in self._fresh_unique_constraints(model):
+                self.execute(constraint.create_sql(model, self))
+            for sql in self._model_indexes_sql(model):
+                self.execute(sql)
+
+    def _fresh_unique_constraints(self, model):
+        """
+        The constraints of the model LIKE doesn't copy, everything but the
+        check constraints. The primary key was dropped for the hypertable.
+        """
+        unique = [[field] for field in model._meta.local_concrete_fields if field.unique and not field.primary_key]
+        unique += [[model._meta.get_field(name) for name in names] for names in model._meta.unique_together]
+        for fields in unique:
+            yield UniqueConstraint(
+                fields=[field.name for field in fields],
+                name=self._create_index_name(model._meta.db_table, [field.column for field in fields], suffix='_uniq'),
+            )
+        for constraint in model._meta.constraints:
+            if not isinstance(constraint, CheckConstraint):
+                yield constraint
+
+    def _fresh_watermark(self, cursor, field, fresh_table):
+        cursor.execute(self.sql_fresh_watermark.format(
+            column=self.quote_name(field.column), fresh_table=self.quote_name(fresh_table)
+        ))
+        return cursor.fetchone()[0]
+
+    def _fresh_condition(self, column, watermark):
+        if watermark is None:
+            return 'TRUE', []
+        return f'{column} > %s', [watermark]
+
+    def _move_sequences(self, cursor, model, fresh_table):
+        """
+        Serial columns of the fresh table share the sequence of the table, it
+        has to survive dropping the table. Identity columns get their own
+        sequence which continues after the copied values.
+        """
+        for field in model._meta.local_concrete_fields:
+            if field.get_internal_type() not in ('AutoField', 'BigAutoField', 'SmallAutoField'):
+                continue
+            column = self.quote_name(field.column)
+
+            cursor.execute(self.sql_serial_sequence.format(
+                table=self.quote_value(fresh_table), column=self.quote_value(field.column)
+            ))
+            sequence = cursor.fetchone()[0]
+            if sequence is not None:
+                self.execute(self.sql_reset_sequence.format(
+                    sequence=self.quote_value(sequence), column=column, table=self.quote_name(fresh_table)
+                ))
+                continue
+
+            cursor.execute(self.sql_serial_sequence.format(
+                table=self.quote_value(model._meta.db_table), column=self.quote_value(field.column)
+            ))
+            sequence = cursor.fetchone()[0]
+            if sequence is not None:
+                self.execute(self.sql_set_sequence_owner.format(
+                    sequence=sequence, fresh_table=self.quote_name(fresh_table), column=column
+                ))
+
     def _set_chunk_time_interval(self, model, field):
         """
         Change time interval for hypertable
@@ -122,6 +419,123 @@ class TimescaleSchemaEditor(DatabaseSchemaEditor):
         sql = self.sql_set_chunk_time_interval.format(table=table, interval=interval)
         self.execute(sql)
 
+    def _add_dimension(self, model, field):
+        """
+        Add the space dimension of the field to an existing (empty) hypertable
+        """
+        table = self.quote_value(model._meta.db_table)
+        partitioning_column = self.quote_value(model._meta.get_field(field.partitioning_column).column)
+
+        sql = self.sql_add_dimension.format(
+            table=table, partitioning_column=partitioning_column, number_partitions=int(field.number_partitions)
+        )
+        self.execute(sql)
+
+    def _set_number_partitions(self, model, field):
+        """
+        Change the number of partitions of the space dimension, applies to new chunks
+        """
+        table = self.quote_value(model._meta.db_table)
+        partitioning_column = self.quote_value(model._meta.get_field(field.partitioning_column).column)
+
+        sql = self.sql_set_number_partitions.format(
+            table=table, partitioning_column=partitioning_column, number_partitions=int(field.number_partitions)
+        )
+        self.execute(sql)
+
+    def _alter_space_partitioning(self, model, old_field, new_field):
+        """
+        Add the space dimension or change its number of partitions, dimensions
+        can't be removed from a hypertable
+        """
+        if old_field.partitioning_column is None:
+            self._add_dimension(model, new_field)
+        elif old_field.partitioning_column == new_field.partitioning_column:
+            self._set_number_partitions(model, new_field)
+        else:
+            raise NotSupportedError(
+                "The space dimension of a hypertable can't be removed or moved to another column."
+            )
+
+    def _set_compression(self, model, field):
+        """
+        Enable (or disable) native compression of the hypertable with
+        the segment by and order by columns of the field
+        """
+        if not field.compressed:
+            options = ['timescaledb.compress = false']
+        else:
+            options = ['timescaledb.compress']
+            if field.compress_segmentby:
+                segmentby = ', '.join(
+                    self.quote_name(model._meta.get_field(name).column) for name in field.compress_segmentby
+                )
+                options.append('timescaledb.compress_segmentby = ' + self.quote_value(segmentby))
+            if field.compress_orderby:
+                orderby = ', '.join(
+                    self.quote_name(model._meta.get_field(name.lstrip('-')).column)
+                    + (' DESC' if name.startswith('-') else '')
+                    for name in field.compress_orderby
+                )
+                options.append('timescaledb.compress_orderby = ' + self.quote_value(orderby))
+
+        table = self.quote_name(model._meta.db_table)
+
+        sql = self.sql_set_compression.format(table=table, options=', '.join(options))
+        self.execute(sql)
+
+    def _add_compression_policy(self, model, field):
+        """
+        Compress chunks older than `compress_after` in the background
+        """
+        table = self.quote_value(model._meta.db_table)
+        compress_after = self.quote_value(field.compress_after)
+
+        sql = self.sql_add_compression_policy.format(table=table, compress_after=compress_after)
+        self.execute(sql)
+
+    def _remove_compression_policy(self, model):
+        """
+        Remove the compression policy of the hypertable, if any
+        """
+        table = self.quote_value(model._meta.db_table)
+
+        sql = self.sql_remove_compression_policy.format(table=table)
+        self.execute(sql)
+
+    def _alter_compression(self, model, old_field, new_field):
+        """
+        Apply changed compression settings and policy
+        """
+        if old_field.compress_after is not None:
+            self._remove_compression_policy(model)
+
+        if (old_field.compressed, old_field.compress_segmentby, old_field.compress_orderby) != \
+                (new_field.compressed, new_field.compress_segmentby, new_field.compress_orderby):
+            self._set_compression(model, new_field)
+
+        if new_field.compress_after is not None:
+            self._add_compression_policy(model, new_field)
+
+    def _add_retention_policy(self, model, field):
+        """
+        Drop chunks older than `drop_after` in the background
+        """
+        table = self.quote_value(model._meta.db_table)
+        drop_after = self.quote_value(field.drop_after)
+
+        sql = self.sql_add_retention_policy.format(table=table, drop_after=drop_after)
+        self.execute(sql)
+
+    def _remove_retention_policy(self, model):
+        """
+        Remove the retention policy of the hypertable, if any
+        """
+        table = self.quote_value(model._meta.db_table)
+
+        sql = self.sql_remove_retention_policy.format(table=table)
+        self.execute(sql)
+
     def create_model(self, model):
         super().create_model(model)
 
@@ -147,11 +561,100 @@ class TimescaleSchemaEditor(DatabaseSchemaEditor):
         if not isinstance(old_field, TimescaleDateTimeField) and isinstance(new_field, TimescaleDateTimeField):
             # migrate existing table to hypertable
             self._create_hypertable(model, new_field, True)
-        # check if old_field and new_field is type `TimescaleDateTimeField` and `interval` is changed
-        elif isinstance(old_field, TimescaleDateTimeField) and isinstance(new_field, TimescaleDateTimeField) \
-                and old_field.interval != new_field.interval:
-            # change chunk-size
-            self._set_chunk_time_interval(model, new_field)
+        # check if old_field and new_field is type `TimescaleDateTimeField`
+        elif isinstance(old_field, TimescaleDateTimeField) and isinstance(new_field, TimescaleDateTimeField):
+            # change chunk-size if `interval` is changed
+            if old_field.interval != new_field.interval:
+                self._set_chunk_time_interval(model, new_field)
+            # replace the primary key if its columns are changed
+            if old_field.primary_key_fields != new_field.primary_key_fields:
+                self._drop_primary_key(model)
+                if new_field.composite_primary_key:
+                    self._add_primary_key(model, new_field)
+            # add or change the space dimension if its settings are changed
+            if (old_field.partitioning_column, old_field.number_partitions) != \
+                    (new_field.partitioning_column, new_field.number_partitions):
+                self._alter_space_partitioning(model, old_field, new_field)
+            # change compression if its settings are changed
+            if (old_field.compress_segmentby, old_field.compress_orderby, old_field.compress_after) != \
+                    (new_field.compress_segmentby, new_field.compress_orderby, new_field.compress_after):
+                self._alter_compression(model, old_field, new_field)
+            # replace the retention policy if `drop_after` is changed
+            if old_field.drop_after != new_field.drop_after:
+                if old_field.drop_after is not None:
+                    self._remove_retention_policy(model)
+                if new_field.drop_after is not None:
+                    self._add_retention_policy(model, new_field)
+
+    def add_index(self, model, index, concurrently=False):
+        if isinstance(index, HypertableIndex) and index.transaction_per_chunk and self.connection.in_atomic_block:
+            logger.warning(
+                "%s is built in a single transaction, blocking writes to %s. Set atomic = False on the "
+                "migration to build it one chunk at a time.", index.name, model._meta.db_table
+            )
+        super().add_index(model, index, concurrently=concurrently)
+
+    def _quote_interval(self, interval):
+        """
+        Format an optional interval argument, `None` becomes NULL
+        """
+        if interval is None:
+            return 'NULL'
+        return 'interval ' + self.quote_value(interval)
+
+    def compile_continuous_aggregate(self, queryset):
+        """
+        Compile the queryset into the SQL of a continuous aggregate
+        definition, with the params inlined
+        """
+        compiler = queryset.order_by().query.get_compiler(connection=self.connection)
+        definition, params = compiler.as_sql()
+        return definition % tuple(self.quote_value(p) for p in params)
+
+    def create_continuous_aggregate(self, model, definition, materialized_only=False):
+        """
+        Create the continuous aggregate for the model from the SQL of its
+        definition. `materialized_only` is always set, the default of
+        TimescaleDB changed to true in 2.13
+        """
+        view = self.quote_name(model._meta.db_table)
+
+        sql = self.sql_create_continuous_aggregate.format(
+            view=view, materialized_only='true' if materialized_only else 'false', definition=definition
+        )
+        self.execute(sql)
+
+    def delete_continuous_aggregate(self, model):
+        """
+        Drop the continuous aggregate of the model
+        """
+        view = self.quote_name(model._meta.db_table)
+
+        sql = self.sql_delete_continuous_aggregate.format(view=view)
+        self.execute(sql)
+
+    def add_continuous_aggregate_policy(self, model, start_offset, end_offset, schedule_interval):
+        """
+        Add a refresh policy to the continuous aggregate of the model
+        """
+        view = self.quote_value(model._meta.db_table)
+
+        sql = self.sql_add_continuous_aggregate_policy.format(
+            view=view,
+            start_offset=self._quote_interval(start_offset),
+            end_offset=self._quote_interval(end_offset),
+            schedule_interval=self.quote_value(schedule_interval),
+        )
+        self.execute(sql)
+
+    def remove_continuous_aggregate_policy(self, model):
+        """
+        Remove the refresh policy of the continuous aggregate of the model
+        """
+        view = self.quote_value(model._meta.db_table)
+
+        sql = self.sql_remove_continuous_aggregate_policy.format(view=view)
+        self.execute(sql)
 
     def _get_extra_condition(self):
         extra_condition = ''
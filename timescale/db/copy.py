@@ -0,0 +1,267 @@
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
+from uuid import uuid4
+
+from django.db import models, transaction
+
+try:
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+except ImportError:  # Django < 4.2 only supports psycopg2
+    is_psycopg3 = False
+
+
+COPY_FORMATS = ('csv', 'binary')
+
+sql_copy_from = 'COPY {table} ({columns}) FROM STDIN WITH (FORMAT {format})'
+
+# binary COPY needs the base types of the columns, without typmods like varchar(100)
+sql_copy_types = (
+    'SELECT to_regtype(name)::oid FROM unnest(%s::text[]) WITH ORDINALITY AS types(name, position) '
+    'ORDER BY position'
+)
+
+sql_create_staging_table = (
+    'CREATE TEMPORARY TABLE {staging_table} ON COMMIT DROP AS SELECT {columns} FROM {table} WITH NO DATA'
+)
+
+sql_add_staging_row_number = 'ALTER TABLE {staging_table} ADD COLUMN {row_number} bigserial'
+
+# the last staged row of each key wins, ON CONFLICT can't update a row twice in one statement
+sql_merge_staging_batch = (
+    'INSERT INTO {table} ({columns}) '
+    'SELECT DISTINCT ON ({conflict_columns}) {columns} FROM {staging_table} '
+    'WHERE {row_number} > %s AND {row_number} <= %s '
+    'ORDER BY {conflict_columns}, {row_number} DESC '
+    'ON CONFLICT ({conflict_columns}) DO {action}'
+)
+
+
+def get_copy_fields(model, columns=None):
+    """
+    Get the fields to copy, by default every concrete field except an
+    auto-created primary key.
+    """
+    if columns is not None:
+        return [model._meta.get_field(name) for name in columns]
+    return [
+        field for field in model._meta.concrete_fields
+        if not (field.primary_key and isinstance(field, models.AutoField))
+    ]
+
+
+def _json_text(value):
+    # Django >= 4.2 wraps JSON in the adapter of the driver, older versions dump it to a string
+    if isinstance(value, str):
+        return value
+    obj = getattr(value, 'obj', getattr(value, 'adapted', value))
+    return (getattr(value, 'dumps', None) or json.dumps)(obj)
+
+
+def _text_value(field, value):
+    """
+    Format a value in the text representation PostgreSQL parses for the
+    column, lists as array literals and binary data as bytea hex.
+    """
+    if field.get_internal_type() == 'JSONField':
+        return _json_text(value)
+    # the drivers wrap binary data in their adapters
+    value = getattr(value, 'obj', getattr(value, 'adapted', value))
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return '%d days %d seconds %d microseconds' % (value.days, value.seconds, value.microseconds)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return '\\x' + bytes(value).hex()
+    if isinstance(value, (list, tuple)):
+        return _array_literal(getattr(field, 'base_field', field), value)
+    return str(value)
+
+
+def _array_literal(field, values):
+    items = []
+    for value in values:
+        if value is None:
+            items.append('NULL')
+        elif isinstance(value, (list, tuple)):
+            # nested lists are the dimensions of a multidimensional array
+            items.append(_array_literal(getattr(field, 'base_field', field), value))
+        else:
+            items.append('"%s"' % _text_value(field, value).replace('\\', '\\\\').replace('"', '\\"'))
+    return '{%s}' % ','.join(items)
+
+
+def _csv_value(field, value):
+    """
+    Format a value as a CSV field in the format PostgreSQL expects, NULL is
+    an unquoted empty field.
+    """
+    if value is None:
+        return ''
+    return '"%s"' % _text_value(field, value).replace('"', '""')
+
+
+def _iter_rows(rows, fields):
+    """
+    Yield the values of each row in the order of the fields. Rows can be
+    sequences, dicts keyed by field name, model instances or a DataFrame.
+    """
+    if hasattr(rows, 'itertuples'):
+        # pandas marks missing values with NaN / NaT, which aren't equal to themselves
+        for row in rows.itertuples(index=False, name=None):
+            yield [None if value != value else value for value in row]
+        return
+
+    for row in rows:
+        if isinstance(row, models.Model):
+            yield [getattr(row, field.attname) for field in fields]
+        elif isinstance(row, dict):
+            yield [row.get(field.name) for field in fields]
+        else:
+            yield row
+
+
+def _iter_batches(rows, fields, batch_rows, connection):
+    rows = (
+        [field.get_db_prep_value(value, connection) for field, value in zip(fields, row)]
+        for row in _iter_rows(rows, fields)
+    )
+    while True:
+        batch = list(islice(rows, batch_rows))
+        if not batch:
+            return
+        yield batch
+
+
+def get_copy_types(cursor, connection, fields):
+    """
+    Get the OIDs of the column types of the fields, for the binary COPY format.
+    """
+    cursor.execute(sql_copy_types, [[field.cast_db_type(connection) for field in fields]])
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _csv_batch(fields, batch):
+    buffer = io.StringIO()
+    for row in batch:
+        buffer.write(','.join(_csv_value(field, value) for field, value in zip(fields, row)))
+        buffer.write('\n')
+    return buffer.getvalue()
+
+
+def copy_rows(connection, model, rows, columns=None, batch_rows=10000, format='csv', table=None):
+    """
+    Stream rows into the table of the model (or `table`) with
+    `COPY ... FROM STDIN`. Rows are consumed lazily and flushed every
+    `batch_rows` rows, so generators of any length can be loaded in
+    constant memory. The binary format requires psycopg 3.
+
+    Returns the number of copied rows.
+    """
+    if format not in COPY_FORMATS:
+        raise ValueError("format must be one of %s." % ', '.join(COPY_FORMATS))
+    if format == 'binary' and not is_psycopg3:
+        raise ValueError("The binary COPY format requires psycopg 3.")
+
+    if columns is None and hasattr(rows, 'columns'):
+        columns = list(rows.columns)
+    fields = get_copy_fields(model, columns)
+
+    sql = sql_copy_from.format(
+        table=connection.ops.quote_name(table or model._meta.db_table),
+        columns=', '.join(connection.ops.quote_name(field.column) for field in fields),
+        format=format,
+    )
+
+    count = 0
+    with transaction.atomic(using=connection.alias, savepoint=False), connection.cursor() as cursor:
+        if is_psycopg3:
+            types = get_copy_types(cursor, connection, fields) if format == 'binary' else None
+            with cursor.cursor.copy(sql) as copy:
+                if types is not None:
+                    copy.set_types(types)
+                for batch in _iter_batches(rows, fields, batch_rows, connection):
+                    if format == 'binary':
+                        for row in batch:
+                            copy.write_row(row)
+                    else:
+                        copy.write(_csv_batch(fields, batch))
+                    count += len(batch)
+        else:
+            for batch in _iter_batches(rows, fields, batch_rows, connection):
+                cursor.cursor.copy_expert(sql, io.StringIO(_csv_batch(fields, batch)))
+                count += len(batch)
+
+    return count
+
+
+def upsert_rows(connection, model, rows, conflict_fields, update_fields=None, columns=None, batch_rows=10000,
+                format='csv'):
+    """
+    Insert rows, updating the existing rows with the same `conflict_fields`
+    (which need a unique constraint, e.g the composite primary key of the
+    hypertable). The rows are staged with COPY into a temporary table and
+    merged with `INSERT ... ON CONFLICT` in batches of `batch_rows`, duplicates
+    within the rows are resolved in favour of the last one. By default all
+    copied fields are updated, `update_fields` have to be copied as well and
+    no fields (`update_fields=[]`) leave existing rows untouched.
+
+    Returns the number of inserted or updated rows.
+    """
+    if columns is None and hasattr(rows, 'columns'):
+        columns = list(rows.columns)
+    fields = get_copy_fields(model, columns)
+    names = [field.name for field in fields]
+    conflict_fields = [model._meta.get_field(name) for name in conflict_fields]
+    if not conflict_fields or any(field.name not in names for field in conflict_fields):
+        raise ValueError("The conflict fields have to be copied.")
+    if update_fields is None:
+        update_fields = [field for field in fields if field not in conflict_fields]
+    else:
+        update_fields = [model._meta.get_field(name) for name in update_fields]
+        # the columns that aren't copied would be updated to NULL or their default
+        if any(field.name not in names for field in update_fields):
+            raise ValueError("The update fields have to be copied.")
+
+    quote_name = connection.ops.quote_name
+    table = quote_name(model._meta.db_table)
+    staging_table = 'timescale_upsert_%s' % uuid4().hex
+    row_number = quote_name('timescale_row_number')
+    column_list = ', '.join(quote_name(field.column) for field in fields)
+
+    if update_fields:
+        action = 'UPDATE SET ' + ', '.join(
+            '%s = EXCLUDED.%s' % (quote_name(field.column), quote_name(field.column)) for field in update_fields
+        )
+    else:
+        action = 'NOTHING'
+    merge_sql = sql_merge_staging_batch.format(
+        table=table, columns=column_list, staging_table=quote_name(staging_table), row_number=row_number,
+        conflict_columns=', '.join(quote_name(field.column) for field in conflict_fields), action=action,
+    )
+
+    count = 0
+    with transaction.atomic(using=connection.alias, savepoint=False):
+        with connection.cursor() as cursor:
+            cursor.execute(sql_create_staging_table.format(
+                staging_table=quote_name(staging_table), columns=column_list, table=table
+            ))
+            cursor.execute(sql_add_staging_row_number.format(
+                staging_table=quote_name(staging_table), row_number=row_number
+            ))
+
+        staged = copy_rows(
+            connection, model, rows, columns=names, batch_rows=batch_rows, format=format, table=staging_table
+        )
+
+        with connection.cursor() as cursor:
+            for start in range(0, staged, batch_rows):
+                cursor.execute(merge_sql, [start, start + batch_rows])
+                count += cursor.rowcount
+    return count
@@ -0,0 +1,190 @@
+import json
+import logging
+import random
+import re
+import time
+from collections import namedtuple
+from contextlib import nullcontext
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.dispatch import Signal
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+
+logger = logging.getLogger(__name__)
+
+# sent after every instrumented query with the `connection` and its `stats`
+query_instrumented = Signal()
+
+chunk_re = re.compile(r'^_hyper_\d+_\d+_chunk$')
+
+# the chunks of the hypertables of the scanned chunks, of the tables queried and of the
+# materialization hypertables of the continuous aggregates queried
+sql_count_chunks = '''
+    SELECT COUNT(*) FROM timescaledb_information.chunks
+    WHERE (hypertable_schema, hypertable_name) IN (
+        SELECT hypertable_schema, hypertable_name FROM timescaledb_information.chunks WHERE chunk_name = ANY(%s)
+    ) OR hypertable_name = ANY(%s) OR (hypertable_schema, hypertable_name) IN (
+        SELECT materialization_hypertable_schema, materialization_hypertable_name
+        FROM timescaledb_information.continuous_aggregates WHERE view_name = ANY(%s)
+    )
+'''
+
+ChunkStats = namedtuple('ChunkStats', [
+    'sql', 'chunks_scanned', 'chunks_excluded', 'chunks_decompressed', 'rows_decompressed', 'rows', 'duration',
+])
+ChunkStats.__doc__ = """
+The chunks a query touched. `chunks_excluded` are the chunks of the
+hypertables that weren't scanned, `chunks_decompressed` the compressed chunks
+scanned. `duration` is in seconds. Values that weren't measured are None,
+e.g the actual rows of a plan that wasn't analyzed.
+"""
+
+
+def _walk(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from _walk(child)
+
+
+def parse_plan(plan, analyzed):
+    """
+    Collect the chunk relations of an `EXPLAIN (FORMAT JSON)` plan. Returns
+    the names of the chunks scanned (chunks excluded at runtime are left out
+    of analyzed plans), the names of the decompressed chunks and the rows
+    they decompressed.
+    """
+    scanned, decompressed, rows_decompressed = set(), set(), 0
+    for node in _walk(plan):
+        name = node.get('Relation Name')
+        if name is None or not chunk_re.match(name):
+            continue
+        loops = node.get('Actual Loops', 1)
+        if analyzed and not loops:
+            continue
+        scanned.add(name)
+        if node.get('Custom Plan Provider') == 'DecompressChunk':
+            decompressed.add(name)
+            rows_decompressed += node.get('Actual Rows', 0) * loops
+    return scanned, decompressed, rows_decompressed if analyzed else None
+
+
+def _load_plan(value):
+    # the json column is parsed by psycopg unless its loader was replaced
+    if isinstance(value, str):
+        value = json.loads(value)
+    return value[0]
+
+
+def explain_chunks(queryset, analyze=True):
+    """
+    EXPLAIN the queryset and count the chunks it scans, excludes and
+    decompresses. With `analyze` the query is executed, chunks excluded at
+    runtime are counted as excluded and the rows and duration are measured.
+    """
+    connection = connections[queryset.db]
+    try:
+        sql, params = queryset.query.get_compiler(connection=connection).as_sql()
+    except EmptyResultSet:
+        return ChunkStats(None, 0, 0, 0, 0, 0, None)
+
+    tables = list({table.table_name for table in queryset.query.alias_map.values()})
+    options = 'ANALYZE, FORMAT JSON' if analyze else 'FORMAT JSON'
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (%s) %s' % (options, sql), params)
+        explained = _load_plan(cursor.fetchone()[0])
+        plan = explained['Plan']
+        scanned, decompressed, rows_decompressed = parse_plan(plan, analyze)
+        cursor.execute(sql_count_chunks, [list(scanned), tables, tables])
+        total = cursor.fetchone()[0]
+
+    return ChunkStats(
+        sql, len(scanned), total - len(scanned), len(decompressed), rows_decompressed,
+        plan['Actual Rows'] if analyze else None,
+        (explained['Planning Time'] + explained['Execution Time']) / 1000 if analyze else None,
+    )
+
+
+class QueryInstrumentation:
+    """
+    An execute wrapper measuring the duration and rows of every query. A
+    sample of `explain_rate` of the SELECT queries is explained (not analyzed)
+    after executing it, to count the chunks they scan, exclude at planning
+    time and decompress. The `ChunkStats` are logged to
+    `timescale.db.instrumentation` at DEBUG level, sent with the
+    `query_instrumented` signal and, when opentelemetry is installed, recorded
+    on a `timescale.query` span.
+
+        with connection.execute_wrapper(QueryInstrumentation(explain_rate=1)):
+            ...
+
+    The Timescale backends install it on every connection with the
+    `TIMESCALE_INSTRUMENT_QUERIES` and `TIMESCALE_INSTRUMENT_EXPLAIN_RATE`
+    settings.
+    """
+
+    def __init__(self, explain_rate=0.0, tracing=True):
+        self.explain_rate = explain_rate
+        self.tracer = trace.get_tracer(__name__) if tracing and trace is not None else None
+
+    def __call__(self, execute, sql, params, many, context):
+        statement = sql.lstrip()[:7].upper()
+        if many or statement.startswith('EXPLAIN'):
+            return execute(sql, params, many, context)
+
+        tracing = self.tracer.start_as_current_span('timescale.query') if self.tracer is not None else nullcontext()
+        with tracing as span:
+            start = time.monotonic()
+            result = execute(sql, params, many, context)
+            duration = time.monotonic() - start
+
+            rowcount = getattr(context['cursor'], 'rowcount', -1)
+            stats = ChunkStats(sql, None, None, None, None, rowcount if rowcount >= 0 else None, duration)
+            if self.explain_rate and statement.startswith(('SELECT', 'WITH')) and random.random() < self.explain_rate:
+                stats = self.explain(context['connection'], sql, params, stats)
+            self.record(context['connection'], stats, span)
+        return result
+
+    def explain(self, connection, sql, params, stats):
+        # a cursor of the DB-API connection doesn't go through the execute wrappers, a failing
+        # EXPLAIN is rolled back to a savepoint so it doesn't abort the transaction of the query
+        savepoint = not connection.get_autocommit()
+        with connection.connection.cursor() as cursor:
+            try:
+                if savepoint:
+                    cursor.execute('SAVEPOINT timescale_explain')
+                cursor.execute('EXPLAIN (FORMAT JSON) %s' % sql, params)
+                scanned, decompressed, rows_decompressed = parse_plan(_load_plan(cursor.fetchone()[0])['Plan'], False)
+                cursor.execute(sql_count_chunks, [list(scanned), [], []])
+                total = cursor.fetchone()[0]
+            except connection.Database.Error:
+                logger.warning('Failed to explain %s', sql, exc_info=True)
+                if savepoint:
+                    cursor.execute('ROLLBACK TO SAVEPOINT timescale_explain')
+                return stats
+            finally:
+                if savepoint:
+                    cursor.execute('RELEASE SAVEPOINT timescale_explain')
+        return stats._replace(
+            chunks_scanned=len(scanned), chunks_excluded=total - len(scanned), chunks_decompressed=len(decompressed),
+        )
+
+    def record(self, connection, stats, span):
+        logger.debug(
+            '(%.3f) %s; rows=%s chunks_scanned=%s chunks_excluded=%s chunks_decompressed=%s',
+            stats.duration, stats.sql, stats.rows, stats.chunks_scanned, stats.chunks_excluded,
+            stats.chunks_decompressed,
+            extra={'alias': connection.alias, 'stats': stats},
+        )
+        query_instrumented.send(sender=connection.__class__, connection=connection, stats=stats)
+        if span is not None:
+            span.set_attribute('db.system', 'postgresql')
+            span.set_attribute('db.statement', stats.sql)
+            for name in ChunkStats._fields[1:]:
+                if getattr(stats, name) is not None:
+                    span.set_attribute('timescale.%s' % name, getattr(stats, name))
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
 from django.db.models.fields import FloatField
+from timescale.db.models.fields import ToolkitAggregateField
 
 
 class Histogram(models.Aggregate):
@@ -36,6 +37,28 @@ class LTTB(models.Func):
         return f'(unnest({sql})).{self.fieldname}', params
 
 
+class Downsample(models.Aggregate):
+    """
+    Downsample a series with one of the Timescale toolkit functions returning
+    a timevector, `method` is one of 'lttb', 'gp_lttb' (gap preserving) or
+    'asap' (asap_smooth). The timevector is unnested by
+    `TimescaleQuerySet.downsample`.
+    """
+    functions = {
+        'lttb': 'lttb',
+        'gp_lttb': 'toolkit_experimental.gp_lttb',
+        'asap': 'asap_smooth',
+    }
+    name = 'downsample'
+    output_field = models.Field()
+
+    def __init__(self, time, value, resolution, method='lttb', **extra):
+        if method not in self.functions:
+            raise ValueError("method must be one of %s." % ', '.join(self.functions))
+        self.function = self.functions[method]
+        super().__init__(time, value, resolution, **extra)
+
+
 class Last(models.Aggregate):
     function = 'last'
     name = 'last'
@@ -51,4 +74,144 @@ class First(models.Aggregate):
     output_field = FloatField()
 
     def __init__(self, expression, bucket):
-        super().__init__(expression, bucket)
\ No newline at end of file
+        super().__init__(expression, bucket)
+
+
+class PercentileAgg(models.Aggregate):
+    """
+    Implementation of the percentile_agg function from the Timescale toolkit,
+    read it with `ApproxPercentile` or combine it with `Rollup`.
+
+    Read more about it here - https://docs.timescale.com/api/latest/hyperfunctions/percentile-approximation/uddsketch/
+    """
+    function = 'percentile_agg'
+    name = 'percentile_agg'
+    output_field = ToolkitAggregateField(aggregate_type='uddsketch')
+
+    def __init__(self, value, **extra):
+        super().__init__(value, **extra)
+
+
+class UddSketch(models.Aggregate):
+    """
+    Implementation of the uddsketch function from the Timescale toolkit, a
+    percentile_agg with a chosen number of buckets and maximum relative error.
+    """
+    function = 'uddsketch'
+    name = 'uddsketch'
+    output_field = ToolkitAggregateField(aggregate_type='uddsketch')
+
+    def __init__(self, value, size=200, max_error=0.001, **extra):
+        super().__init__(size, max_error, value, **extra)
+
+
+class StatsAgg(models.Aggregate):
+    """
+    Implementation of the stats_agg function from the Timescale toolkit, read
+    it with `Average`, `StatsStdDev`, `NumVals` or combine it with `Rollup`.
+
+    Read more about it here - https://docs.timescale.com/api/latest/hyperfunctions/statistical-and-regression-analysis/stats_agg-one-variable/
+    """
+    function = 'stats_agg'
+    name = 'stats_agg'
+    output_field = ToolkitAggregateField(aggregate_type='statssummary1d')
+
+    def __init__(self, value, **extra):
+        super().__init__(value, **extra)
+
+
+class CounterAgg(models.Aggregate):
+    """
+    Implementation of the counter_agg function from the Timescale toolkit for
+    monotonic counters with resets, read it with `Rate` or `Delta` or combine
+    it with `Rollup`.
+
+    Read more about it here - https://docs.timescale.com/api/latest/hyperfunctions/counters-and-gauges/counter_agg/
+    """
+    function = 'counter_agg'
+    name = 'counter_agg'
+    output_field = ToolkitAggregateField(aggregate_type='countersummary')
+
+    def __init__(self, time, value, **extra):
+        super().__init__(time, value, **extra)
+
+
+class TimeWeight(models.Aggregate):
+    """
+    Implementation of the time_weight function from the Timescale toolkit,
+    `method` is 'Linear' or 'LOCF'. Read it with `Average` or combine it with
+    `Rollup`.
+
+    Read more about it here - https://docs.timescale.com/api/latest/hyperfunctions/time-weighted-calculations/time_weight/
+    """
+    function = 'time_weight'
+    name = 'time_weight'
+    output_field = ToolkitAggregateField(aggregate_type='timeweightsummary')
+
+    def __init__(self, time, value, method='Linear', **extra):
+        super().__init__(models.Value(method), time, value, **extra)
+
+
+class Rollup(models.Aggregate):
+    """
+    Implementation of the rollup function from the Timescale toolkit, combines
+    toolkit aggregates e.g the hourly sketches of a continuous aggregate into
+    daily ones without rescanning the raw data.
+    """
+    function = 'rollup'
+    name = 'rollup'
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, **extra)
+
+
+class ApproxPercentile(models.Func):
+    """
+    The approx_percentile accessor of a `PercentileAgg` or `UddSketch`, e.g
+    `ApproxPercentile(0.95, PercentileAgg('temperature'))`.
+    """
+    function = 'approx_percentile'
+    output_field = FloatField()
+
+    def __init__(self, percentile, sketch, **extra):
+        super().__init__(models.Value(percentile), sketch, **extra)
+
+
+class Average(models.Func):
+    """
+    The average accessor of a `StatsAgg` or `TimeWeight`
+    """
+    function = 'average'
+    output_field = FloatField()
+
+
+class StatsStdDev(models.Func):
+    """
+    The stddev accessor of a `StatsAgg`
+    """
+    function = 'stddev'
+    output_field = FloatField()
+
+
+class NumVals(models.Func):
+    """
+    The num_vals accessor of a `StatsAgg`
+    """
+    function = 'num_vals'
+    output_field = models.BigIntegerField()
+
+
+class Rate(models.Func):
+    """
+    The rate accessor of a `CounterAgg`, the increase per second
+    """
+    function = 'rate'
+    output_field = FloatField()
+
+
+class Delta(models.Func):
+    """
+    The delta accessor of a `CounterAgg`, the increase adjusted for resets
+    """
+    function = 'delta'
+    output_field = FloatField()
@@ -0,0 +1,69 @@
+from datetime import timezone as dt_timezone
+
+from django.db.models.sql.constants import MULTI
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+INTEGER_FIELDS = (
+    'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField', 'BigIntegerField', 'SmallIntegerField',
+    'PositiveIntegerField', 'PositiveBigIntegerField', 'PositiveSmallIntegerField',
+)
+
+
+def _column_array(field, values):
+    internal_type = field.get_internal_type()
+
+    if internal_type == 'DateTimeField':
+        # numpy has no timezones, aware datetimes are stored as UTC
+        return numpy.array([
+            value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+            if value is not None and value.tzinfo is not None else value
+            for value in values
+        ], dtype='datetime64[us]')
+    if internal_type == 'DateField':
+        return numpy.array(values, dtype='datetime64[D]')
+    if internal_type in ('FloatField', 'DecimalField'):
+        return numpy.array(values, dtype='float64')
+    if internal_type in INTEGER_FIELDS:
+        if None in values:
+            return numpy.array(values, dtype='float64')
+        return numpy.array(values, dtype='int64')
+    if internal_type == 'BooleanField' and None not in values:
+        return numpy.array(values, dtype='bool')
+
+    array = numpy.empty(len(values), dtype='object')
+    array[:] = values
+    return array
+
+
+def fetch_arrays(queryset, names, chunk_size):
+    """
+    Execute a values queryset and collect the results column-wise, each
+    fetched chunk is converted to arrays directly without building a dict per
+    row. Returns a dict of name -> numpy array.
+    """
+    if numpy is None:
+        raise ImportError("Fetching results as arrays requires numpy to be installed.")
+
+    compiler = queryset.query.get_compiler(using=queryset.db)
+    results = compiler.execute_sql(MULTI, chunked_fetch=True, chunk_size=chunk_size)
+
+    expressions = [expression for expression, sql, alias in compiler.select[:compiler.col_count]]
+    fields = [expression.output_field for expression in expressions]
+    converters = compiler.get_converters(expressions)
+
+    chunks = [[] for name in names]
+    for rows in results:
+        if converters:
+            rows = list(compiler.apply_converters(rows, converters))
+        for index, values in enumerate(zip(*rows)):
+            chunks[index].append(_column_array(fields[index], list(values)))
+
+    return {
+        name: numpy.concatenate(column) if column else _column_array(field, [])
+        for name, field, column in zip(names, fields, chunks)
+    }
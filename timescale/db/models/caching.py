@@ -0,0 +1,182 @@
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db.models.expressions import Col
+from django.db.models.lookups import Lookup
+from django.db.models.query import ValuesIterable
+from django.utils import timezone
+
+from timescale.db.models.expressions import TimeBucket
+from timescale.db.models.utils import align_bucket, get_time_bounds, parse_interval, sort_rows
+
+
+KEY_PREFIX = 'timescale:buckets'
+
+TIME_BOUND_LOOKUPS = ('range', 'gt', 'gte', 'lt', 'lte')
+
+# more closed buckets than this are fetched from the database instead
+MAX_CACHED_BUCKETS = 10000
+
+
+def get_bucket_cache():
+    return caches[getattr(settings, 'TIMESCALE_BUCKET_CACHE', 'default')]
+
+
+def _generation_key(model):
+    return '%s:%s' % (KEY_PREFIX, model._meta.label_lower)
+
+
+def get_generation(model):
+    """
+    Get the token of the current cache generation of the model, every cached
+    bucket of the model is keyed with it.
+    """
+    cache = get_bucket_cache()
+    key = _generation_key(model)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid4().hex, None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate_bucket_cache(model):
+    """
+    Invalidate the cached buckets of the model, e.g after late-arriving data
+    has been written into buckets that were already closed.
+    """
+    get_bucket_cache().set(_generation_key(model), uuid4().hex, None)
+
+
+def get_bucket_shape(queryset):
+    """
+    Get the selected name, time field and width of the time_bucket of a values
+    queryset, or None when the buckets can't be cached.
+    """
+    query = queryset.query
+    if queryset._iterable_class is not ValuesIterable or query.combinator or query.extra:
+        return None
+
+    for alias, annotation in query.annotation_select.items():
+        if isinstance(annotation, TimeBucket):
+            source = annotation.get_source_expressions()
+            interval = parse_interval(source[0])
+            if len(source) != 2 or not isinstance(source[1], Col) or interval is None:
+                return None
+            return alias, source[1].target, interval
+    return None
+
+
+def _is_time_bound(node, time_field):
+    return (
+        isinstance(node, Lookup) and isinstance(node.lhs, Col) and node.lhs.target == time_field
+        and node.lookup_name in TIME_BOUND_LOOKUPS
+    )
+
+
+def _time_bound_lookups(query, time_field):
+    return tuple(sorted(child.lookup_name for child in query.where.children if _is_time_bound(child, time_field)))
+
+
+def fingerprint(queryset, time_field):
+    """
+    Hash the query without the values of its bounds on the bucketed column,
+    the rows of a complete bucket don't depend on them. A moving window, e.g
+    `time__gte=now() - 1 day`, keeps hitting the same keys. The lookups of the
+    bounds are kept, an exclusive bound cuts the bucket an inclusive one keeps.
+    """
+    query = queryset.query.clone()
+    lookups = _time_bound_lookups(query, time_field)
+    query.where.children = [child for child in query.where.children if not _is_time_bound(child, time_field)]
+    sql, params = query.get_compiler(using=queryset.db).as_sql()
+    return hashlib.sha1(repr((queryset.db, sql, params, lookups)).encode()).hexdigest()
+
+
+def _bucket_start(value):
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _fetch_uncached(queryset):
+    queryset = queryset._chain()
+    queryset._bucket_cache = None
+    return list(queryset)
+
+
+def fetch_cached(queryset, settle, timeout):
+    """
+    Evaluate a time_bucket queryset, serving the buckets that closed more than
+    `settle` ago from the cache. Only the open buckets, and closed ones that
+    are missing from the cache, are queried.
+    """
+    base = queryset.order_by()
+    base.query.clear_limits()
+    base._bucket_cache = None
+
+    query = queryset.query
+    ordering = [name for name in query.order_by if isinstance(name, str)]
+    selected = (*query.values_select, *query.annotation_select)
+    if len(ordering) != len(query.order_by) or any(name.lstrip('-') not in selected for name in ordering):
+        return _fetch_uncached(queryset)
+
+    shape = get_bucket_shape(base)
+    start, end = get_time_bounds(query, shape[1]) if shape is not None else (None, None)
+    if start is None:
+        return _fetch_uncached(queryset)
+
+    alias, time_field, interval = shape
+    closed_until = align_bucket(timezone.now() - settle, interval)
+    end = _bucket_start(end) if end is not None else closed_until
+
+    # only the buckets within the bounds are cached, the ones cut by them are always fetched
+    start = _bucket_start(start)
+    first = align_bucket(start, interval)
+    # time__gt cuts the bucket starting at the bound
+    if first != start or 'gt' in _time_bound_lookups(query, time_field):
+        first += interval
+    starts = []
+    bucket = first
+    while bucket < closed_until and bucket + interval <= end and len(starts) <= MAX_CACHED_BUCKETS:
+        starts.append(bucket)
+        bucket += interval
+    if not starts or len(starts) > MAX_CACHED_BUCKETS:
+        return _fetch_uncached(queryset)
+
+    try:
+        prefix = '%s:%s:%s' % (KEY_PREFIX, get_generation(base.model), fingerprint(base, time_field))
+    except EmptyResultSet:
+        return []
+
+    cache = get_bucket_cache()
+    keys = {bucket: '%s:%s' % (prefix, bucket.isoformat()) for bucket in starts}
+    hits = cache.get_many(keys.values())
+
+    rows = []
+    fetch_from = starts[-1] + interval
+    for bucket in starts:
+        if keys[bucket] not in hits:
+            fetch_from = bucket
+            break
+        rows.extend(hits[keys[bucket]])
+
+    if fetch_from == first:
+        fetched = list(base)
+    else:
+        if first != start:
+            rows.extend(base.filter(**{'%s__lt' % time_field.name: first}))
+        fetched = list(base.filter(**{'%s__gte' % time_field.name: fetch_from}))
+    closed = {bucket: [] for bucket in starts if bucket >= fetch_from}
+    for row in fetched:
+        bucket = _bucket_start(row[alias])
+        if bucket in closed:
+            closed[bucket].append(row)
+    if closed:
+        cache.set_many({keys[bucket]: bucket_rows for bucket, bucket_rows in closed.items()}, timeout)
+    rows.extend(fetched)
+
+    sort_rows(rows, ordering)
+    return rows[query.low_mark:query.high_mark]
@@ -0,0 +1,46 @@
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import F, Value
+
+from timescale.db.models.aggregates import Downsample
+
+
+# the timevector is computed once per partition and unnested into both columns
+sql_downsample = (
+    'SELECT {partitions}sampled.time, sampled.value '
+    'FROM ({query}) AS downsampled CROSS JOIN LATERAL unnest(downsampled.series) AS sampled '
+    'ORDER BY {ordering}sampled.time'
+)
+
+
+def fetch_downsampled(queryset, time, value, resolution, method, partition_by):
+    """
+    Downsample the series of the queryset (per partition) in a single pass,
+    returns a list of dicts keyed by the partition, time and value names.
+    """
+    partitions = {'partition_%d' % index: F(name) for index, name in enumerate(partition_by)}
+    # without partitions the whole series is aggregated, the constant isn't grouped by
+    inner = queryset.order_by().values(**partitions or {'partition': Value(1)}).annotate(
+        series=Downsample(time, value, resolution, method=method)
+    )
+
+    connection = connections[inner.db]
+    try:
+        sql, params = inner.query.get_compiler(connection=connection).as_sql()
+    except EmptyResultSet:
+        return []
+
+    quote_name = connection.ops.quote_name
+    columns = ''.join('downsampled.%s, ' % quote_name(alias) for alias in partitions)
+    sql = sql_downsample.format(
+        partitions=''.join(
+            'downsampled.%s AS %s, ' % (quote_name(alias), quote_name(name))
+            for alias, name in zip(partitions, partition_by)
+        ),
+        query=sql, ordering=columns,
+    )
+
+    names = [*partition_by, time, value]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
@@ -0,0 +1,114 @@
+import warnings
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.expressions import Col
+from django.utils import timezone
+
+from timescale.db.models.expressions import TimeBucket, TimeBucketNG
+from timescale.db.models.utils import align_bucket, get_time_bounds, get_time_field, is_bucket_aligned, parse_interval
+
+
+class FullHypertableScanWarning(RuntimeWarning):
+    """
+    A query on a hypertable has no constant bounds on the partition column,
+    the planner can't exclude chunks and scans every chunk of the hypertable.
+    """
+
+
+def get_bucket(queryset, name):
+    """
+    Get the time_bucket annotation called `name` and the column it buckets,
+    or None when it isn't a time_bucket of a column.
+    """
+    annotation = queryset.query.annotations.get(name)
+    if not isinstance(annotation, (TimeBucket, TimeBucketNG)):
+        return None
+    source = annotation.get_source_expressions()[1]
+    if not isinstance(source, Col):
+        return None
+    return annotation, source.target
+
+
+def _make_aware(value):
+    if isinstance(value, datetime) and timezone.is_naive(value):
+        return timezone.make_aware(value)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_make_aware(item) for item in value)
+    return value
+
+
+def implied_time_filters(bucket, field, lookup, value):
+    """
+    Get the lookups on the bucketed column implied by a lookup on the bucket,
+    e.g `bucket__gte` -> `time__gte`. They select a superset of the rows of
+    the bucket lookup, so both are applied.
+    """
+    if lookup == 'range':
+        start, end = value
+        return {**implied_time_filters(bucket, field, 'gte', start), **implied_time_filters(bucket, field, 'lte', end)}
+    if lookup == 'exact':
+        return {**implied_time_filters(bucket, field, 'gte', value), **implied_time_filters(bucket, field, 'lte', value)}
+    if not isinstance(value, datetime):
+        return {}
+
+    # the start of a bucket is never after the time in it
+    if lookup in ('gt', 'gte'):
+        return {'%s__%s' % (field.name, lookup): value}
+
+    interval = parse_interval(bucket.get_source_expressions()[0])
+    if interval is None or lookup not in ('lt', 'lte'):
+        return {}
+    # without an offset or origin the buckets are aligned like `align_bucket`
+    if isinstance(bucket, TimeBucket) and len(bucket.get_source_expressions()) == 2:
+        if lookup == 'lt' and is_bucket_aligned(value, interval):
+            return {'%s__lt' % field.name: value}
+        return {'%s__lt' % field.name: align_bucket(value, interval) + interval}
+    return {'%s__lt' % field.name: value + interval}
+
+
+def prepare_bucket_filters(queryset, q):
+    """
+    Make the naive datetimes filtered on time_bucket annotations aware and
+    collect the time filters implied by the ones every row has to match.
+    Returns the prepared Q and the implied Q.
+    """
+    required = q.connector == Q.AND and not q.negated
+    children, implied = [], Q()
+    for child in q.children:
+        if isinstance(child, Q):
+            child, child_implied = prepare_bucket_filters(queryset, child)
+            if required:
+                implied &= child_implied
+        elif isinstance(child, tuple):
+            key, value = child
+            name, _, lookup = key.partition('__')
+            bucket = get_bucket(queryset, name)
+            if bucket is not None:
+                value = _make_aware(value)
+                child = (key, value)
+                if required:
+                    implied &= Q(**implied_time_filters(*bucket, lookup or 'exact', value))
+        children.append(child)
+    return Q(*children, _connector=q.connector, _negated=q.negated), implied
+
+
+def check_chunk_exclusion(queryset):
+    """
+    Warn with a `FullHypertableScanWarning` when the query on a hypertable
+    has no constant bounds on the partition column. Enabled with the
+    `TIMESCALE_WARN_FULL_SCANS` setting, which defaults to DEBUG.
+    """
+    if not getattr(settings, 'TIMESCALE_WARN_FULL_SCANS', settings.DEBUG):
+        return
+    field = get_time_field(queryset.model)
+    if field is None or queryset.query.is_empty():
+        return
+    if get_time_bounds(queryset.query, field) == (None, None):
+        warnings.warn(
+            "The query on %s has no constant bounds on %r, every chunk of the hypertable is scanned." % (
+                queryset.model._meta.label, field.name
+            ),
+            FullHypertableScanWarning,
+        )
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
+from django.db.models.functions import Cast
 from django.db.models.functions.mixins import (
     FixDurationInputMixin,
     NumericOutputFieldMixin,
@@ -114,3 +115,72 @@ class TimeBucketGapFill(models.Func):
                 interval = interval / datapoints
         output_field = TimescaleDateTimeField(interval=interval)
         super().__init__(interval, expression, start, end, output_field=output_field)
+
+
+class Locf(models.Func):
+    """
+    Implementation of the locf function from Timescale, carries the last
+    value forward into the empty buckets of a time_bucket_gapfill query.
+    `prev` is the value used before the first bucket, e.g a subquery.
+
+    Read more about it here - https://docs.timescale.com/api/latest/hyperfunctions/gapfilling/locf/
+    """
+
+    function = "locf"
+    name = "locf"
+
+    def _resolve_output_field(self):
+        return self.get_source_expressions()[0].output_field
+
+    def __init__(self, expression, prev=None, treat_null_as_missing=False, **extra):
+        args = [expression]
+        if prev is not None or treat_null_as_missing:
+            args.append(prev if prev is not None else models.Value(None))
+        if treat_null_as_missing:
+            args.append(models.Value(True))
+        super().__init__(*args, **extra)
+
+
+class Interpolate(models.Func):
+    """
+    Implementation of the interpolate function from Timescale, linearly
+    interpolates the empty buckets of a time_bucket_gapfill query. `prev` and
+    `next` are expressions for the (time, value) records used beyond the range.
+
+    Read more about it here - https://docs.timescale.com/api/latest/hyperfunctions/gapfilling/interpolate/
+    """
+
+    function = "interpolate"
+    name = "interpolate"
+
+    def _resolve_output_field(self):
+        return self.get_source_expressions()[0].output_field
+
+    def __init__(self, expression, prev=None, next=None, **extra):
+        args = [expression]
+        if prev is not None or next is not None:
+            args.append(prev if prev is not None else models.Value(None))
+        if next is not None:
+            args.append(next)
+        super().__init__(*args, **extra)
+
+
+GAP_FILLS = {'locf': Locf, 'interpolate': Interpolate}
+
+
+class WidthBucket(models.Func):
+    """
+    The width_bucket function of Postgres with explicit (ascending) bucket
+    edges, returns 0 below the first edge, i for edges[i - 1] <= value < edges[i]
+    and len(edges) from the last edge on.
+    """
+
+    function = "width_bucket"
+    name = "width_bucket"
+    output_field = models.IntegerField()
+
+    def __init__(self, expression, edges, **extra):
+        # width_bucket(anyelement, anyarray) before PG14 needs both sides typed as double precision,
+        # psycopg2 adapts a list of floats to ARRAY[...] which is numeric[]
+        edges = Cast(models.Value([float(edge) for edge in edges]), ArrayField(models.FloatField()))
+        super().__init__(Cast(expression, models.FloatField()), edges, **extra)
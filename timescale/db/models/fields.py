@@ -1,13 +1,185 @@
-from django.db.models import DateTimeField
+from django.core import checks
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import DateTimeField, Field, UniqueConstraint
 
 
 class TimescaleDateTimeField(DateTimeField):
-    def __init__(self, *args, interval, **kwargs):
+    """
+    The partition column of a hypertable. Besides the chunk `interval`, a
+    space dimension hash partitioning the chunks on `partitioning_column` (a
+    field name) into `number_partitions` can be declared. Native compression
+    can be declared with `compress_segmentby` and `compress_orderby` (field
+    names, prefixed with '-' for descending order) and a policy compressing
+    chunks older than `compress_after`. A retention policy dropping chunks
+    older than `drop_after` can be declared as well.
+
+    Django's primary key is dropped when the hypertable is created, as it
+    doesn't include the partition column. `composite_primary_key` replaces it
+    with a primary key on the given field names, or on the primary key and
+    the partition column when True, e.g for upserts on `('time', 'device')`.
+    """
+
+    def __init__(self, *args, interval, partitioning_column=None, number_partitions=None, compress_segmentby=None,
+                 compress_orderby=None, compress_after=None, drop_after=None, composite_primary_key=None, **kwargs):
         self.interval = interval
+        self.composite_primary_key = composite_primary_key if isinstance(composite_primary_key, bool) \
+            else self._as_list(composite_primary_key)
+        self.partitioning_column = partitioning_column
+        self.number_partitions = number_partitions
+        self.compress_segmentby = self._as_list(compress_segmentby)
+        self.compress_orderby = self._as_list(compress_orderby)
+        self.compress_after = compress_after
+        self.drop_after = drop_after
         super().__init__(*args, **kwargs)
 
+    def check(self, **kwargs):
+        return [
+            *super().check(**kwargs),
+            *self._check_space_partitioning(),
+            *self._check_unique_constraints(),
+            *self._check_composite_primary_key(),
+        ]
+
+    def _check_space_partitioning(self):
+        if self.partitioning_column is None:
+            if self.number_partitions is not None:
+                return [
+                    checks.Error(
+                        "'number_partitions' requires a 'partitioning_column'.",
+                        obj=self,
+                        id='timescale.E001',
+                    )
+                ]
+            return []
+
+        errors = []
+        if not isinstance(self.number_partitions, int) or self.number_partitions < 1:
+            errors.append(
+                checks.Error(
+                    "'number_partitions' must be a positive integer when 'partitioning_column' is set.",
+                    obj=self,
+                    id='timescale.E002',
+                )
+            )
+        try:
+            self.model._meta.get_field(self.partitioning_column)
+        except FieldDoesNotExist:
+            errors.append(
+                checks.Error(
+                    "'partitioning_column' refers to the nonexistent field '%s'." % self.partitioning_column,
+                    obj=self,
+                    id='timescale.E003',
+                )
+            )
+        return errors
+
+    def _check_unique_constraints(self):
+        """
+        Unique indexes of a hypertable have to include every partitioning
+        column, creating them fails otherwise.
+        """
+        opts = self.model._meta
+        partitioning = {self.name, self.partitioning_column} - {None}
+
+        unique = [(field.name,) for field in opts.local_fields if field.unique and not field.primary_key]
+        unique.extend(tuple(fields) for fields in opts.unique_together)
+        unique.extend(
+            tuple(constraint.fields) for constraint in opts.constraints
+            if isinstance(constraint, UniqueConstraint) and constraint.fields
+        )
+
+        return [
+            checks.Warning(
+                "The unique constraint on %s doesn't include the partitioning column(s) %s of the hypertable." % (
+                    ', '.join(repr(name) for name in fields),
+                    ', '.join(repr(name) for name in sorted(partitioning)),
+                ),
+                hint="Add %s to the constraint or drop it." % ' and '.join(sorted(partitioning)),
+                obj=self,
+                id='timescale.W001',
+            )
+            for fields in unique if not partitioning <= set(fields)
+        ]
+
+    def _check_composite_primary_key(self):
+        if not self.composite_primary_key:
+            return []
+
+        for name in self.primary_key_fields:
+            try:
+                self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return [
+                    checks.Error(
+                        "'composite_primary_key' refers to the nonexistent field '%s'." % name,
+                        obj=self,
+                        id='timescale.E004',
+                    )
+                ]
+
+        partitioning = {self.name, self.partitioning_column} - {None}
+        if not partitioning <= set(self.primary_key_fields):
+            return [
+                checks.Error(
+                    "'composite_primary_key' must include the partitioning column(s) %s." % ', '.join(
+                        repr(name) for name in sorted(partitioning)
+                    ),
+                    obj=self,
+                    id='timescale.E005',
+                )
+            ]
+        return []
+
+    @property
+    def primary_key_fields(self):
+        """
+        The names of the fields of the composite primary key, or None
+        """
+        if not self.composite_primary_key:
+            return None
+        if self.composite_primary_key is True:
+            names = [self.model._meta.pk.name, self.name, self.partitioning_column]
+            return [name for index, name in enumerate(names) if name is not None and name not in names[:index]]
+        return list(self.composite_primary_key)
+
+    @staticmethod
+    def _as_list(value):
+        if isinstance(value, str):
+            return [value]
+        return list(value) if value is not None else None
+
+    @property
+    def compressed(self):
+        return any(option is not None for option in (
+            self.compress_segmentby, self.compress_orderby, self.compress_after
+        ))
+
     def deconstruct(self):
         name, path, args, kwargs = super().deconstruct()
         kwargs['interval'] = self.interval
+        for option in ('partitioning_column', 'number_partitions', 'compress_segmentby', 'compress_orderby',
+                       'compress_after', 'drop_after', 'composite_primary_key'):
+            if getattr(self, option) is not None:
+                kwargs[option] = getattr(self, option)
+
+        return name, path, args, kwargs
+
+
+class ToolkitAggregateField(Field):
+    """
+    A column holding a Timescale toolkit aggregate, e.g the `uddsketch` of
+    `percentile_agg` materialized by a continuous aggregate. It's read with the
+    accessors of `timescale.db.models.aggregates` and combined with `Rollup`.
+    """
 
-        return name, path, args, kwargs
\ No newline at end of file
+    def __init__(self, *args, aggregate_type='uddsketch', **kwargs):
+        self.aggregate_type = aggregate_type
+        super().__init__(*args, **kwargs)
+
+    def db_type(self, connection):
+        return self.aggregate_type
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['aggregate_type'] = self.aggregate_type
+        return name, path, args, kwargs
@@ -0,0 +1,96 @@
+from collections import namedtuple
+
+from django.db.models import Count, Max, Min
+from django.db.models.functions import Least
+
+from timescale.db.models.aggregates import ApproxPercentile, UddSketch
+from timescale.db.models.arrays import numpy
+from timescale.db.models.expressions import WidthBucket
+
+
+HistogramArray = namedtuple('HistogramArray', ['groups', 'edges', 'counts'])
+HistogramArray.__doc__ = """
+A histogram per group. `groups` is the list of group values (tuples when
+grouping by several fields), `edges` the bucket edges and `counts` a
+len(groups) x len(edges) - 1 int64 array.
+"""
+
+EDGE_METHODS = ('linear', 'log', 'quantile')
+
+
+def quantile_edges(queryset, field, num_of_buckets):
+    """
+    Edges splitting the values of the field into buckets holding about the
+    same number of values, approximated with an uddsketch in one query.
+    """
+    sketch = UddSketch(field)
+    quantiles = queryset.order_by().aggregate(**{
+        'quantile_%d' % index: ApproxPercentile(index / num_of_buckets, sketch)
+        for index in range(num_of_buckets + 1)
+    })
+    if quantiles['quantile_0'] is None:
+        return None
+    # repeated values collapse buckets
+    return numpy.unique(numpy.array(list(quantiles.values()), dtype='float64'))
+
+
+def range_edges(queryset, field, num_of_buckets, method):
+    """
+    Edges over the range of the values of the field, equally wide or equally
+    wide on a log scale.
+    """
+    bounds = queryset.order_by().aggregate(low=Min(field), high=Max(field))
+    if bounds['low'] is None:
+        return None
+    if method == 'linear':
+        return numpy.linspace(bounds['low'], bounds['high'], num_of_buckets + 1)
+    if bounds['low'] <= 0:
+        raise ValueError("Log scale edges require positive values, the minimum of %s is %s." % (field, bounds['low']))
+    return numpy.geomspace(bounds['low'], bounds['high'], num_of_buckets + 1)
+
+
+def fetch_histogram(queryset, field, edges, num_of_buckets, group_by):
+    """
+    Count the values of the field per group into the buckets between the
+    edges, the counting is done by the database and only the non empty
+    buckets are transferred. Values outside the edges are left out, a value on
+    the last edge is counted in the last bucket like `numpy.histogram` does.
+    """
+    if numpy is None:
+        raise ImportError("Fetching histograms as arrays requires numpy to be installed.")
+
+    if isinstance(edges, str):
+        if edges not in EDGE_METHODS:
+            raise ValueError("edges must be a sequence or one of %s." % ', '.join(EDGE_METHODS))
+        if edges == 'quantile':
+            edges = quantile_edges(queryset, field, num_of_buckets)
+        else:
+            edges = range_edges(queryset, field, num_of_buckets, edges)
+        if edges is None:
+            return HistogramArray([], numpy.empty(0), numpy.zeros((0, 0), dtype='int64'))
+    else:
+        edges = numpy.asarray(edges, dtype='float64')
+        if edges.ndim != 1 or len(edges) < 2 or numpy.any(numpy.diff(edges) <= 0):
+            raise ValueError("edges must be at least two increasing values.")
+
+    num_of_buckets = max(len(edges) - 1, 1)
+    rows = (queryset
+            .filter(**{'%s__range' % field: (float(edges[0]), float(edges[-1]))})
+            .order_by()
+            .values(*group_by, histogram_bucket=Least(WidthBucket(field, edges), num_of_buckets))
+            .annotate(histogram_count=Count('*'))
+            .order_by(*group_by, 'histogram_bucket')
+            .values_list(*group_by, 'histogram_bucket', 'histogram_count'))
+
+    # without grouping all values are counted into a single histogram
+    groups = {} if group_by else {None: 0}
+    indexes, buckets, counts = [], [], []
+    for row in rows:
+        group = row[:-2] if len(group_by) > 1 else (row[0] if group_by else None)
+        indexes.append(groups.setdefault(group, len(groups)))
+        buckets.append(row[-2] - 1)
+        counts.append(row[-1])
+
+    histogram = numpy.zeros((len(groups), num_of_buckets), dtype='int64')
+    histogram[indexes, buckets] = counts
+    return HistogramArray(list(groups), edges, histogram)
@@ -0,0 +1,35 @@
+from django.contrib.postgres.indexes import BTreeIndex
+from django.db.models import Index
+
+
+class HypertableIndex(BTreeIndex):
+    """
+    A B-tree index on a hypertable built with `timescaledb.transaction_per_chunk`,
+    every chunk is indexed in its own transaction so only the chunk being
+    indexed blocks writes instead of the whole hypertable. The option can't
+    be used inside a transaction, migrations adding the index should set
+    `atomic = False`, otherwise it's built like a regular index.
+
+        class Meta:
+            indexes = [HypertableIndex(fields=['device', '-time'], name='metric_device_time_idx')]
+    """
+
+    def __init__(self, *expressions, transaction_per_chunk=True, **kwargs):
+        self.transaction_per_chunk = transaction_per_chunk
+        super().__init__(*expressions, **kwargs)
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        if not self.transaction_per_chunk:
+            kwargs['transaction_per_chunk'] = False
+        return path, args, kwargs
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        with_params = self.get_with_params()
+        if self.transaction_per_chunk and not schema_editor.connection.in_atomic_block:
+            with_params.append('timescaledb.transaction_per_chunk')
+
+        statement = Index.create_sql(self, model, schema_editor, using=' USING %s' % (using or self.suffix), **kwargs)
+        if with_params:
+            statement.parts['extra'] = ' WITH (%s)%s' % (', '.join(with_params), statement.parts['extra'])
+        return statement
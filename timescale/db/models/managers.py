@@ -1,5 +1,15 @@
-from django.db import models
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.db import connections, models, router
+from django.db.transaction import TransactionManagementError
+from django.utils import timezone
+from timescale.db.copy import copy_rows, upsert_rows
+from timescale.db.models.caching import invalidate_bucket_cache
+from timescale.db.models.expressions import TimeBucket, TimeBucketNG
 from timescale.db.models.querysets import *
+from timescale.db.models.utils import time_argument_sql
 from typing import Optional
 
 
@@ -12,17 +22,233 @@ class TimescaleManager(models.Manager):
     def get_queryset(self):
         return TimescaleQuerySet(self.model, using=self._db)
 
-    def time_bucket(self, field, interval):
-        return self.get_queryset().time_bucket(field, interval)
+    def time_bucket(self, field, interval, annotations: Dict = None):
+        return self.get_queryset().time_bucket(field, interval, annotations)
 
-    def time_bucket_ng(self, field, interval):
-        return self.get_queryset().time_bucket_ng(field, interval)
+    def time_bucket_ng(self, field, interval, annotations: Dict = None):
+        return self.get_queryset().time_bucket_ng(field, interval, annotations)
 
-    def time_bucket_gapfill(self, field: str, interval: str, start: datetime, end: datetime, datapoints: Optional[int] = None):
-        return self.get_queryset().time_bucket_gapfill(field, interval, start, end, datapoints)
+    def time_bucket_gapfill(self, field: str, interval: str, start: datetime, end: datetime, datapoints: Optional[int] = None,
+                            annotations: Dict = None, fill=None):
+        return self.get_queryset().time_bucket_gapfill(field, interval, start, end, datapoints, annotations, fill)
 
     def histogram(self, field: str, min_value: float, max_value: float, num_of_buckets: int = 5):
         return self.get_queryset().histogram(field, min_value, max_value, num_of_buckets)
 
+    def histogram_array(self, field: str, edges='linear', num_of_buckets: int = 10, group_by=()):
+        return self.get_queryset().histogram_array(field, edges, num_of_buckets, group_by)
+
     def lttb(self, time: str, value: str, num_of_counts: int = 20):
         return self.get_queryset().lttb(time, value, num_of_counts)
+
+    def downsample(self, time: str, value: str, resolution: int, method: str = 'lttb', partition_by=()):
+        return self.get_queryset().downsample(time, value, resolution, method, partition_by)
+
+    def prepare(self, builder, server_side: bool = False):
+        return self.get_queryset().prepare(builder, server_side)
+
+    def drop_chunks(self, older_than=None, newer_than=None):
+        """
+        Drop the chunks of the hypertable that only contain data older and/or
+        newer than the given datetime or interval (e.g '30 days'). Returns the
+        names of the dropped chunks.
+        """
+        if older_than is None and newer_than is None:
+            raise ValueError("drop_chunks() requires older_than and/or newer_than.")
+
+        arguments, params = ['%s'], [self.model._meta.db_table]
+        for name, value in (('older_than', older_than), ('newer_than', newer_than)):
+            if value is not None:
+                sql, value_params = time_argument_sql(value)
+                arguments.append('%s => %s' % (name, sql))
+                params.extend(value_params)
+
+        connection = connections[self._db or router.db_for_write(self.model)]
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT drop_chunks(%s)' % ', '.join(arguments), params)
+            dropped = [row[0] for row in cursor.fetchall()]
+        if dropped:
+            self.invalidate_bucket_cache()
+        return dropped
+
+    def invalidate_bucket_cache(self):
+        """
+        Invalidate the buckets of the model cached with `cache_buckets`, e.g
+        after late-arriving data was written into closed buckets.
+        """
+        invalidate_bucket_cache(self.model)
+
+    def copy_from(self, rows, columns=None, batch_rows: int = 10000, format: str = 'csv'):
+        """
+        Bulk load rows into the hypertable with `COPY ... FROM STDIN`. Accepts
+        any iterable (including generators) of sequences, dicts or model
+        instances, or a pandas DataFrame. `columns` are the field names of the
+        values, by default every field except an auto-created primary key.
+        Returns the number of copied rows.
+        """
+        connection = connections[self._db or router.db_for_write(self.model)]
+        return copy_rows(connection, self.model, rows, columns=columns, batch_rows=batch_rows, format=format)
+
+    def upsert_many(self, rows, conflict_cols, update_fields=None, columns=None, batch_rows: int = 10000):
+        """
+        Idempotently load rows, e.g resent or late data. The rows (anything
+        `copy_from` accepts) are staged with COPY and merged into the hypertable
+        with `INSERT ... ON CONFLICT (conflict_cols)`, updating `update_fields`
+        (by default every copied field) of existing rows. Duplicates within the
+        rows are resolved in favour of the last one. `conflict_cols` need a
+        unique constraint, e.g `composite_primary_key`.
+        Returns the number of inserted or updated rows.
+        """
+        connection = connections[self._db or router.db_for_write(self.model)]
+        return upsert_rows(
+            connection, self.model, rows, conflict_cols, update_fields=update_fields, columns=columns,
+            batch_rows=batch_rows,
+        )
+
+    async def acopy_from(self, rows, columns=None, batch_rows: int = 10000, format: str = 'csv'):
+        """
+        Async counterpart of `copy_from`. With psycopg 3 the rows are copied on
+        a native async connection and can be an async iterable, otherwise
+        `copy_from` runs in a thread.
+        """
+        from timescale.db.aio import acopy_rows, has_native_async
+
+        if not has_native_async():
+            if hasattr(rows, '__aiter__'):
+                raise TypeError("Copying from an async iterable requires psycopg 3.")
+            return await sync_to_async(self.copy_from)(rows, columns=columns, batch_rows=batch_rows, format=format)
+
+        connection = connections[self._db or router.db_for_write(self.model)]
+        return await acopy_rows(connection, self.model, rows, columns=columns, batch_rows=batch_rows, format=format)
+
+
+POSTGRES_EPOCH = datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+
+MaterializationLag = namedtuple('MaterializationLag', [
+    'watermark', 'lag', 'job_id', 'schedule_interval', 'last_run_started_at', 'last_successful_finish',
+    'last_run_status', 'last_run_duration', 'next_start', 'total_failures',
+])
+MaterializationLag.__doc__ = """
+How far a continuous aggregate trails its hypertable. `watermark` is the end
+of the materialized buckets and `lag` the time since then, the other fields
+describe the refresh policy job and are None without a policy.
+"""
+
+
+class ContinuousAggregateManager(TimescaleManager):
+    """
+    The manager of `TimescaleContinuousAggregate` models, adds the controls
+    trading the freshness of the continuous aggregate against the cost of
+    refreshing it.
+    """
+
+    sql_refresh = 'CALL refresh_continuous_aggregate(%s, %s, %s)'
+
+    sql_set_materialized_only = 'ALTER MATERIALIZED VIEW {view} SET (timescaledb.materialized_only = {enabled})'
+
+    sql_materialized_only = (
+        'SELECT materialized_only FROM timescaledb_information.continuous_aggregates WHERE view_name = %s'
+    )
+
+    # the internal functions moved to their own schema in TimescaleDB 2.12
+    sql_function_schema = (
+        "SELECT n.nspname FROM pg_proc p JOIN pg_namespace n ON n.oid = p.pronamespace "
+        "WHERE p.proname = 'cagg_watermark' ORDER BY n.nspname = '_timescaledb_functions' DESC LIMIT 1"
+    )
+
+    # in microseconds since the PostgreSQL epoch for timestamp buckets
+    sql_watermark = (
+        'SELECT {schema}.cagg_watermark(mat_hypertable_id) '
+        'FROM _timescaledb_catalog.continuous_agg WHERE user_view_name = %s'
+    )
+
+    sql_refresh_job = (
+        "SELECT j.job_id, j.schedule_interval, s.last_run_started_at, s.last_successful_finish, "
+        "s.last_run_status, s.last_run_duration, s.next_start, s.total_failures "
+        "FROM timescaledb_information.continuous_aggregates c "
+        "JOIN timescaledb_information.jobs j ON j.hypertable_schema = c.materialization_hypertable_schema "
+        "AND j.hypertable_name = c.materialization_hypertable_name "
+        "AND j.proc_name = 'policy_refresh_continuous_aggregate' "
+        "LEFT JOIN timescaledb_information.job_stats s ON s.job_id = j.job_id "
+        "WHERE c.view_name = %s"
+    )
+
+    def _get_connection(self, write=False):
+        alias = self._db or (router.db_for_write(self.model) if write else router.db_for_read(self.model))
+        return connections[alias]
+
+    def _get_bucket_field(self):
+        columns = {field.column: field.name for field in self.model._meta.concrete_fields}
+        for alias, annotation in self.model.get_aggregate_queryset().query.annotations.items():
+            if isinstance(annotation, (TimeBucket, TimeBucketNG)) and alias in columns:
+                return columns[alias]
+        raise ValueError("The definition of %s has no time_bucket column." % self.model._meta.label)
+
+    def refresh(self, start: Optional[datetime] = None, end: Optional[datetime] = None):
+        """
+        Materialize the buckets of the continuous aggregate between start and
+        end (unbounded when None), e.g after a backfill. TimescaleDB refreshes
+        whole buckets within the window, it can't run in a transaction.
+        """
+        connection = self._get_connection(write=True)
+        if connection.in_atomic_block:
+            raise TransactionManagementError("Continuous aggregates can't be refreshed inside a transaction.")
+        with connection.cursor() as cursor:
+            cursor.execute(self.sql_refresh, [self.model._meta.db_table, start, end])
+        invalidate_bucket_cache(self.model)
+
+    def set_materialized_only(self, enabled: bool = True):
+        """
+        Answer queries from the materialized buckets only (cheaper), or union
+        them with the not yet materialized buckets computed from the hypertable
+        in real time. Applies to every query of the continuous aggregate.
+        """
+        connection = self._get_connection(write=True)
+        with connection.cursor() as cursor:
+            cursor.execute(self.sql_set_materialized_only.format(
+                view=connection.ops.quote_name(self.model._meta.db_table), enabled='true' if enabled else 'false',
+            ))
+        invalidate_bucket_cache(self.model)
+
+    def is_materialized_only(self) -> bool:
+        with self._get_connection().cursor() as cursor:
+            cursor.execute(self.sql_materialized_only, [self.model._meta.db_table])
+            return cursor.fetchone()[0]
+
+    def watermark(self) -> Optional[datetime]:
+        """
+        Get the end of the materialized buckets, buckets from here on are only
+        available in real time. None before the first refresh.
+        """
+        with self._get_connection().cursor() as cursor:
+            cursor.execute(self.sql_function_schema)
+            schema = cursor.fetchone()[0]
+            cursor.execute(self.sql_watermark.format(schema=schema), [self.model._meta.db_table])
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        try:
+            return POSTGRES_EPOCH + timedelta(microseconds=row[0])
+        except OverflowError:  # the minimum value of an empty continuous aggregate
+            return None
+
+    def materialized(self):
+        """
+        Query the materialized buckets only, regardless of the
+        `materialized_only` setting of the continuous aggregate.
+        """
+        watermark = self.watermark()
+        if watermark is None:
+            return self.get_queryset().none()
+        return self.get_queryset().filter(**{'%s__lt' % self._get_bucket_field(): watermark})
+
+    def materialization_lag(self) -> MaterializationLag:
+        """
+        Report how far the materialization trails behind now and the state of
+        the refresh policy from `timescaledb_information.jobs` and `job_stats`.
+        """
+        watermark = self.watermark()
+        with self._get_connection().cursor() as cursor:
+            cursor.execute(self.sql_refresh_job, [self.model._meta.db_table])
+            job = cursor.fetchone() or (None,) * 8
+        return MaterializationLag(watermark, timezone.now() - watermark if watermark is not None else None, *job)
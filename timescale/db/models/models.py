@@ -1,6 +1,6 @@
 from django.db import models
 from timescale.db.models.fields import TimescaleDateTimeField
-from timescale.db.models.managers import TimescaleManager
+from timescale.db.models.managers import ContinuousAggregateManager, TimescaleManager
 
 
 class TimescaleModel(models.Model):
@@ -16,4 +16,45 @@ class TimescaleModel(models.Model):
     
 
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+
+class TimescaleContinuousAggregate(models.Model):
+    """
+    A helper class for declaring a Timescale continuous aggregate as a Django
+    model. Subclasses describe the rollup by implementing
+    `get_aggregate_queryset`, which returns a `TimescaleQuerySet` whose selected
+    names match the columns of the model, e.g.
+
+        class HourlyMetric(TimescaleContinuousAggregate):
+            bucket = models.DateTimeField(primary_key=True)
+            avg_temperature = models.FloatField()
+
+            @classmethod
+            def get_aggregate_queryset(cls):
+                return Metric.timescale.time_bucket('time', '1 hour', {'avg_temperature': Avg('temperature')})
+
+    The model is unmanaged, the view itself is created by the
+    `CreateContinuousAggregate` migration operation, written with the
+    `make_continuous_aggregate_migration` command. `materialized_only`
+    controls whether the view only answers from the materialized buckets
+    instead of the real-time union with the newest data of the hypertable.
+    Subclasses that declare their own Meta should inherit from
+    `TimescaleContinuousAggregate.Meta`. Refreshing and the freshness of the
+    view are controlled with the `ContinuousAggregateManager` methods of
+    `timescale`.
+    """
+    materialized_only = False
+
+    objects = models.Manager()
+    timescale = ContinuousAggregateManager()
+
+    class Meta:
+        abstract = True
+        managed = False
+
+    @classmethod
+    def get_aggregate_queryset(cls):
+        raise NotImplementedError(
+            "subclasses of TimescaleContinuousAggregate must provide a get_aggregate_queryset() method"
+        )
@@ -0,0 +1,201 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.db.models.query import ValuesIterable
+from django.utils import timezone
+
+from timescale.db.models.aggregates import First, Last
+from timescale.db.models.utils import align_bucket, get_time_bounds, get_time_field, parse_interval, sort_rows
+
+
+sql_chunk_boundaries = (
+    'SELECT DISTINCT range_start FROM timescaledb_information.chunks '
+    'WHERE hypertable_name = %s AND range_start > %s AND range_start < %s ORDER BY range_start'
+)
+
+
+def _min(values):
+    values = [value for value in values if value is not None]
+    return min(values) if values else None
+
+
+def _max(values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def _sum(values):
+    values = [value for value in values if value is not None]
+    return sum(values) if values else None
+
+
+# how the partial results of an aggregate are combined
+MERGES = {Sum: _sum, Count: sum, Min: _min, Max: _max}
+
+
+def get_time_range(queryset):
+    """
+    Get the time field of the hypertable and the bounds the queryset filters
+    it on, e.g with `time__range`.
+    """
+    time_field = get_time_field(queryset.model)
+    if time_field is None:
+        raise ValueError("parallel() requires a model with a TimescaleDateTimeField.")
+
+    start, end = get_time_bounds(queryset.query, time_field)
+    if start is None or end is None:
+        raise ValueError("parallel() requires the queryset to be filtered on a range of '%s'." % time_field.name)
+    return time_field, start, end
+
+
+def get_chunk_boundaries(queryset, start, end):
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql_chunk_boundaries, [queryset.model._meta.db_table, start, end])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def get_interval_boundaries(start, end, interval):
+    """
+    Get the bucket boundaries of the interval between start and end, aligned
+    like time_bucket.
+    """
+    if timezone.is_naive(end):
+        end = timezone.make_aware(end)
+
+    boundary = align_bucket(start, interval) + interval
+    boundaries = []
+    while boundary < end:
+        boundaries.append(boundary)
+        boundary += interval
+    return boundaries
+
+
+def _merge_plan(queryset):
+    """
+    Get the partial queryset and how each aggregate is merged. Averages are
+    weighted with a hidden count and First/Last carry the min/max time of
+    their partition.
+    """
+    query = queryset.query
+    partial = queryset.order_by()
+    partial.query.clear_limits()
+
+    hidden = {}
+    merges = {}
+    for alias, annotation in query.annotation_select.items():
+        if not getattr(annotation, 'contains_aggregate', False):
+            continue
+        kind = type(annotation)
+        if getattr(annotation, 'distinct', False) or kind not in (*MERGES, Avg, First, Last):
+            raise ValueError("parallel() cannot merge the '%s' aggregate." % alias)
+
+        if kind is Avg:
+            weight = 'parallel_%d' % len(hidden)
+            hidden[weight] = Count(annotation.get_source_expressions()[0], filter=annotation.filter)
+            merges[alias] = (kind, weight)
+        elif kind in (First, Last):
+            order = 'parallel_%d' % len(hidden)
+            bound = Min if kind is First else Max
+            hidden[order] = bound(annotation.get_source_expressions()[1], filter=annotation.filter)
+            merges[alias] = (kind, order)
+        else:
+            merges[alias] = (kind, None)
+
+    if hidden:
+        partial = partial.annotate(**hidden)
+    return partial, merges, list(hidden)
+
+
+def _merge_rows(rows, merges):
+    merged = {}
+    for alias, (kind, extra) in merges.items():
+        values = [row[alias] for row in rows]
+        if kind is Avg:
+            weights = [row[extra] for row in rows]
+            total = sum(weights)
+            merged[alias] = sum(value * weight for value, weight in zip(values, weights) if weight) / total \
+                if total else None
+        elif kind in (First, Last):
+            candidates = [row for row in rows if row[extra] is not None]
+            if not candidates:
+                merged[alias] = None
+            else:
+                pick = min if kind is First else max
+                merged[alias] = pick(candidates, key=lambda row: row[extra])[alias]
+        else:
+            merged[alias] = MERGES[kind](values)
+    return merged
+
+
+def _fetch(queryset):
+    try:
+        return list(queryset)
+    finally:
+        connections[queryset.db].close()
+
+
+def fetch_parallel(queryset, workers, split):
+    """
+    Split the time range of the queryset at chunk boundaries (`split='chunk'`)
+    or buckets of an interval, run the parts concurrently on separate
+    connections and merge the partial results.
+    """
+    if queryset._iterable_class is not ValuesIterable:
+        raise TypeError("parallel() requires a values() queryset.")
+
+    query = queryset.query
+    ordering = [name for name in query.order_by if isinstance(name, str)]
+    selected = (*query.values_select, *query.annotation_select)
+    if len(ordering) != len(query.order_by) or any(name.lstrip('-') not in selected for name in ordering):
+        raise ValueError("parallel() can only order by the selected names.")
+
+    time_field, start, end = get_time_range(queryset)
+    if split == 'chunk':
+        boundaries = get_chunk_boundaries(queryset, start, end)
+    else:
+        interval = parse_interval(split)
+        if interval is None:
+            raise ValueError("split must be 'chunk' or an interval with a fixed length, e.g '1 day'.")
+        boundaries = get_interval_boundaries(start, end, interval)
+
+    aggregated = any(
+        getattr(annotation, 'contains_aggregate', False) for annotation in query.annotation_select.values()
+    )
+    if aggregated:
+        partial, merges, hidden = _merge_plan(queryset)
+    else:
+        partial, merges, hidden = queryset._chain(), {}, []
+        partial.query.clear_limits()
+
+    parts = []
+    for index in range(len(boundaries) + 1):
+        part = partial
+        if index > 0:
+            part = part.filter(**{'%s__gte' % time_field.name: boundaries[index - 1]})
+        if index < len(boundaries):
+            part = part.filter(**{'%s__lt' % time_field.name: boundaries[index]})
+        parts.append(part)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_fetch, parts))
+
+    if not aggregated:
+        rows = [row for result in results for row in result]
+    else:
+        aggregates = set(merges) | set(hidden)
+        groups = {}
+        for row in (row for result in results for row in result):
+            key = tuple((name, value) for name, value in row.items() if name not in aggregates)
+            groups.setdefault(key, []).append(row)
+
+        rows = []
+        for key, group in groups.items():
+            row = dict(key)
+            row.update(_merge_rows(group, merges))
+            rows.append({name: row[name] for name in group[0] if name not in hidden})
+
+    if ordering and (aggregated or len(parts) > 1):
+        sort_rows(rows, ordering)
+
+    return rows[query.low_mark:query.high_mark]
@@ -0,0 +1,199 @@
+import hashlib
+import re
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models.query import ValuesIterable
+from django.utils import timezone
+
+
+placeholder_re = re.compile(r'%%|%s')
+
+MARKER_SHIFT = timedelta(days=12345, seconds=6789)
+
+PreparedTemplate = namedtuple('PreparedTemplate', ['sql', 'params', 'bindings', 'names', 'compiler', 'converters'])
+PreparedTemplate.__doc__ = """
+The compiled SQL of a query shape. `bindings` maps the positions of `params`
+to the names of the arguments bound there, the other params are constant.
+`sql` is None when the query can't match any rows.
+"""
+
+
+def _marker(value, index, variant):
+    """
+    A value of the same type as the argument that can be found in the compiled
+    params again, two variants tell constants from values derived from it.
+    """
+    number = 2 * index + variant + 1
+    # the variants are far apart so values derived from them (e.g aligned to a bucket) differ too
+    shift = MARKER_SHIFT * variant
+    if isinstance(value, bool):
+        raise TypeError("Boolean arguments can't be told apart from constants, filter on a Value instead.")
+    if isinstance(value, datetime):
+        return datetime(1900, 1, 1, tzinfo=dt_timezone.utc) + shift + timedelta(microseconds=number)
+    if isinstance(value, date):
+        return date(1000, 1, 1) + shift + timedelta(days=number)
+    if isinstance(value, timedelta):
+        return timedelta(days=-99999) + shift + timedelta(microseconds=number)
+    if isinstance(value, int):
+        # within the range of a SmallIntegerField, out of range lookups match nothing
+        return -32768 + number
+    if isinstance(value, float):
+        return -1.2345e-300 * number
+    if isinstance(value, str):
+        return '\x00timescale_%d' % number
+    raise TypeError("Unsupported argument type %s, the shape of the query mustn't depend on it." % type(value).__name__)
+
+
+def _compile(queryset):
+    queryset, names = queryset._get_values_source()
+    if queryset._iterable_class is not ValuesIterable:
+        raise ValueError("Prepared queries have to return dicts, build them with values().")
+    compiler = queryset.query.get_compiler(using=queryset.db)
+    try:
+        sql, params = compiler.as_sql()
+    except EmptyResultSet:
+        return None, None, names, compiler
+    return sql, list(params), names, compiler
+
+
+def _find_markers(params, markers):
+    """
+    Split the compiled params into the positions of the markers, mapped to
+    the names of their arguments, and the constants.
+    """
+    names = {marker: name for name, marker in markers.items()}
+    bindings, constants = {}, []
+    for index, param in enumerate(params):
+        try:
+            name = None if isinstance(param, bool) else names.get(param)
+        except TypeError:  # unhashable, e.g a list
+            name = None
+        if name is None:
+            constants.append(param)
+        else:
+            bindings[index] = name
+    return bindings, constants
+
+
+def compile_template(base, builder, arguments):
+    """
+    Compile the queryset built from `base` and marker values of the
+    arguments, the positions the markers end up at are rebound on execution.
+    The query is compiled with two sets of markers, the constants have to be
+    the same in both. Arguments the SQL depends on aren't supported, e.g
+    bucket filters (they add derived time bounds) or `__in` lists.
+    """
+    compiled = []
+    for variant in (0, 1):
+        markers = {name: _marker(value, index, variant) for index, (name, value) in enumerate(arguments.items())}
+        compiled.append((markers, _compile(builder(base, **markers))))
+
+    (markers, (sql, params, names, compiler)), (other_markers, (other_sql, other_params, _, _)) = compiled
+    if sql is None:
+        return PreparedTemplate(None, None, {}, names, compiler, None)
+
+    bindings, constants = _find_markers(params, markers)
+    other_bindings, other_constants = _find_markers(other_params, other_markers)
+    if sql != other_sql or bindings != other_bindings or constants != other_constants:
+        raise ValueError("The SQL of the prepared query depends on the values of its arguments.")
+    missing = set(arguments) - set(bindings.values())
+    if missing:
+        raise ValueError("The arguments %s aren't bound as query parameters." % ', '.join(sorted(missing)))
+
+    expressions = [expression for expression, *_ in compiler.select[:compiler.col_count]]
+    return PreparedTemplate(sql, params, bindings, names, compiler, compiler.get_converters(expressions))
+
+
+def _prepared_statements(connection):
+    # prepared statements live as long as the database session
+    cached = getattr(connection, '_timescale_prepared_statements', None)
+    if cached is None or cached[0] is not connection.connection:
+        cached = (connection.connection, set())
+        connection._timescale_prepared_statements = cached
+    return cached[1]
+
+
+def _server_side_statement(connection, template):
+    """
+    Prepare the template as a server side statement on the connection, every
+    param (the constants too) is bound with `EXECUTE`. Returns its name.
+    """
+    name = 'timescale_%s' % hashlib.sha1(template.sql.encode()).hexdigest()[:16]
+    prepared = _prepared_statements(connection)
+    if name in prepared:
+        return name
+
+    numbers = iter(range(1, len(template.params) + 1))
+
+    def replace(match):
+        # executed without params, the escaped percent signs are taken literally
+        return '%' if match.group() == '%%' else '$%d' % next(numbers)
+
+    with connection.cursor() as cursor:
+        cursor.execute('PREPARE %s AS %s' % (name, placeholder_re.sub(replace, template.sql)))
+    prepared.add(name)
+    return name
+
+
+def _bind(value):
+    # like the ORM, naive datetimes are in the current timezone
+    if settings.USE_TZ and isinstance(value, datetime) and timezone.is_naive(value):
+        return timezone.make_aware(value)
+    return value
+
+
+class PreparedQuery:
+    """
+    A query shape built by `builder(queryset, **arguments)` that is compiled
+    once per database and executed with new arguments, skipping the ORM
+    compiler. The arguments can be datetimes, dates, timedeltas, numbers and
+    strings used as query parameters, e.g the bounds of a `time__range`.
+
+    With `server_side` the SQL is prepared as a statement on every connection
+    using it, saving the planning of repeated queries as well.
+    """
+
+    def __init__(self, queryset, builder, server_side=False):
+        self.queryset = queryset
+        self.builder = builder
+        self.server_side = server_side
+        self.templates = {}
+
+    def get_template(self, arguments):
+        db = self.queryset.db
+        if db not in self.templates:
+            self.templates[db] = compile_template(self.queryset, self.builder, arguments)
+        return self.templates[db]
+
+    def __call__(self, **arguments):
+        template = self.get_template(arguments)
+        if template.sql is None:
+            return []
+
+        bound = set(template.bindings.values())
+        if set(arguments) != bound:
+            raise TypeError("The prepared query takes the arguments %s." % ', '.join(sorted(bound)))
+
+        params = list(template.params)
+        for index, name in template.bindings.items():
+            params[index] = _bind(arguments[name])
+
+        connection = connections[self.queryset.db]
+        with connection.cursor() as cursor:
+            if self.server_side:
+                name = _server_side_statement(connection, template)
+                cursor.execute(
+                    'EXECUTE %s(%s)' % (name, ', '.join(['%s'] * len(params))) if params else 'EXECUTE %s' % name,
+                    params,
+                )
+            else:
+                cursor.execute(template.sql, params)
+            rows = cursor.fetchall()
+
+        if template.converters:
+            rows = template.compiler.apply_converters(rows, template.converters)
+        return [dict(zip(template.names, row)) for row in rows]
@@ -1,12 +1,117 @@
-from django.db import models
-from timescale.db.models.expressions import TimeBucket, TimeBucketGapFill, TimeBucketNG
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import connections, models
+from django.db.models.query import ValuesIterable
+from timescale.db.models.expressions import GAP_FILLS, TimeBucket, TimeBucketGapFill, TimeBucketNG
 from timescale.db.models.aggregates import Histogram, LTTB
-from typing import Dict, Optional
+from timescale.db.models.arrays import fetch_arrays
+from timescale.db.models.caching import fetch_cached
+from timescale.db.models.downsampling import fetch_downsampled
+from timescale.db.models.exclusion import check_chunk_exclusion, prepare_bucket_filters
+from timescale.db.models.histograms import fetch_histogram
+from timescale.db.models.parallel import fetch_parallel
+from timescale.db.models.prepared import PreparedQuery
+from timescale.db.models.routing import get_continuous_aggregate_route
+from timescale.db.models.utils import normalise_row, parse_interval
+from typing import Dict, Iterable, Optional, Union
 from datetime import datetime
+from itertools import islice
+
+
+def _datetime_names(normalise_datetimes):
+    # `True` normalises the bucket only, other datetime columns are left as they are
+    return ('bucket',) if normalise_datetimes is True else tuple(normalise_datetimes)
+
+
+async def _aiterator(queryset, chunk_size):
+    if hasattr(queryset, 'aiterator'):
+        async for row in queryset.aiterator(chunk_size=chunk_size):
+            yield row
+        return
+
+    # Django < 4.1, the rows are fetched in chunks on the thread of the connection
+    rows = queryset.iterator(chunk_size=chunk_size)
+    fetch = sync_to_async(lambda: list(islice(rows, chunk_size)))
+    while True:
+        chunk = await fetch()
+        if not chunk:
+            return
+        for row in chunk:
+            yield row
 
 
 class TimescaleQuerySet(models.QuerySet):
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._use_continuous_aggregates = None
+        self._bucket_cache = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._use_continuous_aggregates = self._use_continuous_aggregates
+        clone._bucket_cache = self._bucket_cache
+        return clone
+
+    def _fetch_all(self):
+        if self._result_cache is None:
+            check_chunk_exclusion(self)
+        if self._result_cache is None and self._bucket_cache is not None:
+            self._result_cache = fetch_cached(self, *self._bucket_cache)
+        if self._result_cache is None:
+            route = self._get_continuous_aggregate_route()
+            if route is not None:
+                self._result_cache = list(self._iter_route(route, route.queryset))
+        super()._fetch_all()
+
+    def filter(self, *args, **kwargs):
+        """
+        Filters on a time_bucket annotation e.g `bucket__gte` are compiled to
+        expressions the planner can't exclude chunks with, the implied
+        constant bounds on the bucketed column are added as well.
+        """
+        q, implied = prepare_bucket_filters(self, models.Q(*args, **kwargs))
+        clone = super().filter(q)
+        if implied:
+            clone.query.add_q(implied)
+        return clone
+
+    def _get_continuous_aggregate_route(self):
+        enabled = self._use_continuous_aggregates
+        if enabled is None:
+            enabled = getattr(settings, "TIMESCALE_CONTINUOUS_AGGREGATE_ROUTING", False)
+        return get_continuous_aggregate_route(self) if enabled else None
+
+    @staticmethod
+    def _iter_route(route, rows):
+        for row in rows:
+            yield {route.renames.get(name, name): value for name, value in row.items()}
+
+    def use_continuous_aggregates(self, enabled: bool = True):
+        """
+        Answer time_bucket queries from a continuous aggregate with a compatible
+        bucket width and group by columns, when one is registered. Enabled for all
+        querysets with the `TIMESCALE_CONTINUOUS_AGGREGATE_ROUTING` setting.
+        """
+        clone = self._chain()
+        clone._use_continuous_aggregates = enabled
+        return clone
+
+    def cache_buckets(self, settle='1 hour', timeout=DEFAULT_TIMEOUT):
+        """
+        Cache the rows of closed buckets of a time_bucket queryset filtered on a
+        start time. Buckets that ended more than `settle` ago are stored per
+        bucket in the `TIMESCALE_BUCKET_CACHE` cache for `timeout` seconds,
+        later evaluations only query the open buckets. Call
+        `invalidate_bucket_cache()` on the manager after writing late data.
+        """
+        if parse_interval(settle) is None:
+            raise ValueError("settle must be an interval with a fixed length, e.g '1 hour'.")
+        clone = self._chain()
+        clone._bucket_cache = (parse_interval(settle), timeout)
+        return clone
+
     def time_bucket(self, field: str, interval: str, annotations: Dict = None):
         """
         Wraps the TimescaleDB time_bucket function into a queryset method.
@@ -23,11 +128,31 @@ class TimescaleQuerySet(models.QuerySet):
             return self.values(bucket=TimeBucketNG(field, interval)).order_by('-bucket').annotate(**annotations)
         return self.values(bucket=TimeBucketNG(field, interval)).order_by('-bucket')
 
-    def time_bucket_gapfill(self, field: str, interval: str, start: datetime, end: datetime, datapoints: Optional[int] = None):
+    def time_bucket_gapfill(self, field: str, interval: str, start: datetime, end: datetime, datapoints: Optional[int] = None,
+                            annotations: Dict = None, fill=None):
         """
         Wraps the TimescaleDB time_bucket_gapfill function into a queryset method.
+        The empty buckets of the annotations are filled in the database with
+        `fill`, either 'locf' or 'interpolate' for all annotations or a dict of
+        annotation name -> method.
         """
-        return self.values(bucket=TimeBucketGapFill(field, interval, start, end, datapoints))
+        queryset = self.values(bucket=TimeBucketGapFill(field, interval, start, end, datapoints))
+        if fill and not annotations:
+            raise ValueError("fill requires the annotations to fill.")
+        if not annotations:
+            return queryset
+
+        methods = fill if isinstance(fill, dict) else dict.fromkeys(annotations, fill)
+        unknown = [name for name in methods if name not in annotations]
+        if unknown:
+            raise ValueError("fill refers to unknown annotations: %s." % ', '.join(unknown))
+        for name, method in methods.items():
+            if method is not None and method not in GAP_FILLS:
+                raise ValueError("fill must be one of %s." % ', '.join(GAP_FILLS))
+        return queryset.annotate(**{
+            name: GAP_FILLS[methods[name]](expression) if methods.get(name) else expression
+            for name, expression in annotations.items()
+        })
 
     def histogram(self, field: str, min_value: float, max_value: float, num_of_buckets: int = 5):
         """
@@ -35,20 +160,174 @@ class TimescaleQuerySet(models.QuerySet):
         """
         return self.values(histogram=Histogram(field, min_value, max_value, num_of_buckets))
 
+    def histogram_array(self, field: str, edges='linear', num_of_buckets: int = 10, group_by=()):
+        """
+        Count the values of the field into buckets per group, returns a
+        `HistogramArray` with the counts as a groups x buckets NumPy array.
+        `edges` are explicit increasing bucket edges or 'linear', 'log' or
+        'quantile' (from an uddsketch) edges for `num_of_buckets` buckets over
+        the filtered values. Requires numpy.
+        """
+        if isinstance(group_by, str):
+            group_by = (group_by,)
+        return fetch_histogram(self, field, edges, num_of_buckets, tuple(group_by))
+
     def lttb(self, time: str, value: str, num_of_counts: int = 20):
         """
         Wraps the TimescaleDB toolkit lttb function into a queryset method.
         """
         return self.values(
-            lttb_t=LTTB(time, value, num_of_counts, time),
-            lttb_v=LTTB(time, value, num_of_counts, value)
+            lttb_t=LTTB(time, value, num_of_counts, 'time'),
+            lttb_v=LTTB(time, value, num_of_counts, 'value')
         )
 
-    def to_list(self, normalise_datetimes: bool = False):
+    def downsample(self, time: str, value: str, resolution: int, method: str = 'lttb', partition_by=()):
+        """
+        Downsample the series to `resolution` points with the Timescale toolkit,
+        `method` is 'lttb', 'gp_lttb' or 'asap'. Unlike `lttb` the series is
+        computed once and unnested into both columns, per `partition_by` group
+        (e.g per device). Returns a list of dicts keyed by the partition, time
+        and value names.
+        """
+        return fetch_downsampled(self, time, value, resolution, method, tuple(partition_by))
+
+    def to_list(self, normalise_datetimes: Union[bool, Iterable[str]] = False):
+        """
+        Evaluate the queryset into a list. `normalise_datetimes` replaces the
+        `bucket` datetimes with their ISO 8601 representation, or those of the
+        given column names.
+        """
+        results = list(self)
         if normalise_datetimes:
-            normalised = []
-            for b in list(self):
-                b["bucket"] = b["bucket"].isoformat()
-                normalised.append(b)
-            return normalised
-        return list(self)
+            names = _datetime_names(normalise_datetimes)
+            for index, row in enumerate(results):
+                results[index] = normalise_row(row, names)
+        return results
+
+    def stream(self, chunk_size: int = 2000, normalise_datetimes: Union[bool, Iterable[str]] = False,
+               batches: bool = False):
+        """
+        Iterate over the results with a server-side cursor, fetching `chunk_size`
+        rows at a time instead of materializing the whole result. With `batches`
+        lists of up to `chunk_size` rows are yielded instead of single rows.
+        """
+        route = self._get_continuous_aggregate_route()
+        if route is not None:
+            rows = self._iter_route(route, route.queryset.iterator(chunk_size=chunk_size))
+        else:
+            rows = self.iterator(chunk_size=chunk_size)
+
+        if normalise_datetimes:
+            names = _datetime_names(normalise_datetimes)
+            rows = (normalise_row(row, names) for row in rows)
+
+        if not batches:
+            yield from rows
+            return
+
+        while True:
+            batch = list(islice(rows, chunk_size))
+            if not batch:
+                return
+            yield batch
+
+    def parallel(self, workers: int = 4, split='chunk'):
+        """
+        Evaluate a long time range concurrently. The `time__range` of the
+        queryset is split at chunk boundaries (`split='chunk'`) or at buckets of
+        an interval (e.g `split='1 month'`), the parts run on `workers` separate
+        connections and the partial results are merged. Supports Sum, Count,
+        Min, Max, Avg, First and Last. Returns a list of rows.
+        """
+        return fetch_parallel(self, workers, split)
+
+    def prepare(self, builder, server_side: bool = False):
+        """
+        Compile the query built by `builder(queryset, **arguments)` once and
+        only rebind the arguments when the returned `PreparedQuery` is called,
+        e.g for the bounds of a `time__range`. With `server_side` the SQL is
+        also prepared as a statement on the database. Returns lists of dicts.
+        """
+        return PreparedQuery(self, builder, server_side=server_side)
+
+    def _get_values_source(self):
+        """
+        Get the values queryset that answers this queryset (the continuous
+        aggregate it's routed to, if any) and the names of its results.
+        """
+        route = self._get_continuous_aggregate_route()
+        queryset = route.queryset if route is not None else self
+        if queryset._fields is None:
+            queryset = queryset.values()
+
+        query = queryset.query
+        names = getattr(query, 'selected', None) or (*query.extra_select, *query.values_select, *query.annotation_select)
+        if route is not None:
+            return queryset, [route.renames.get(name, name) for name in names]
+        return queryset, list(names)
+
+    def explain_chunks(self, analyze: bool = True):
+        """
+        EXPLAIN the query and count the chunks it scans, excludes and
+        decompresses, returns `ChunkStats`. With `analyze` the query is
+        executed to measure the rows, duration and runtime exclusion.
+        """
+        from timescale.db.instrumentation import explain_chunks
+
+        return explain_chunks(self._get_values_source()[0], analyze=analyze)
+
+    def to_arrays(self, chunk_size: int = 10000):
+        """
+        Fetch the results column-wise into NumPy arrays, returns a dict of
+        selected name -> array. Datetime columns (e.g `bucket`) become
+        datetime64 arrays in UTC, numeric columns with NULLs become float arrays
+        with NaN. Requires numpy.
+        """
+        queryset, names = self._get_values_source()
+        return fetch_arrays(queryset, names, chunk_size)
+
+    async def _aiter_rows(self, chunk_size):
+        from timescale.db.aio import aiter_values, has_native_async
+
+        if has_native_async() and self._iterable_class is ValuesIterable:
+            queryset, names = self._get_values_source()
+            compiler = queryset.query.get_compiler(using=queryset.db)
+            async for row in aiter_values(connections[queryset.db], compiler, names, chunk_size):
+                yield row
+            return
+
+        route = self._get_continuous_aggregate_route()
+        if route is None:
+            async for row in _aiterator(self, chunk_size):
+                yield row
+        else:
+            async for row in _aiterator(route.queryset, chunk_size):
+                yield {route.renames.get(name, name): value for name, value in row.items()}
+
+    async def astream(self, chunk_size: int = 2000, normalise_datetimes: Union[bool, Iterable[str]] = False,
+                      batches: bool = False):
+        """
+        Async counterpart of `stream`. With psycopg 3 values querysets run on a
+        native async connection, otherwise the rows are fetched in a thread.
+        """
+        names = _datetime_names(normalise_datetimes) if normalise_datetimes else ()
+        batch = []
+        async for row in self._aiter_rows(chunk_size):
+            if names:
+                row = normalise_row(row, names)
+            if not batches:
+                yield row
+                continue
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def ato_list(self, normalise_datetimes: Union[bool, Iterable[str]] = False):
+        """
+        Async counterpart of `to_list`, e.g for evaluating `time_bucket`,
+        `histogram` or `lttb` querysets from async views.
+        """
+        return [row async for row in self.astream(normalise_datetimes=normalise_datetimes)]
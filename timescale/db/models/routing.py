@@ -0,0 +1,207 @@
+from collections import namedtuple
+from functools import lru_cache
+
+from django.apps import apps
+from django.db import models
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.expressions import Col, Star
+from django.db.models.functions import Cast
+from django.db.models.lookups import Lookup
+from django.db.models.query import ValuesIterable
+from django.db.models.sql.where import AND
+
+from timescale.db.models.expressions import TimeBucket
+from timescale.db.models.utils import is_bucket_aligned, parse_interval
+
+
+# how the aggregates of a rollup are combined into a coarser bucket
+REAGGREGATES = {Sum: Sum, Count: Sum, Min: Min, Max: Max}
+
+# lookups on the time column that can be answered from bucket-aligned rows
+BUCKET_LOOKUPS = ('gte', 'lt')
+
+QueryShape = namedtuple(
+    'QueryShape', ['model', 'time_field', 'interval', 'bucket', 'group_by', 'aggregates', 'filters', 'ordering']
+)
+QueryShape.__doc__ = """
+The structure of a time_bucket + aggregate query, `aggregates` maps the
+selected names to (aggregate class, source field name, output field).
+"""
+
+Route = namedtuple('Route', ['queryset', 'renames'])
+
+
+def _describe_aggregate(aggregate):
+    if type(aggregate) not in (Sum, Count, Min, Max, Avg):
+        return None
+    if aggregate.filter is not None or getattr(aggregate, 'distinct', False):
+        return None
+    if len(aggregate.source_expressions) != 1:
+        return None
+
+    source = aggregate.source_expressions[0]
+    if isinstance(source, Star):
+        source = '*'
+    elif isinstance(source, Col):
+        source = source.target.name
+    else:
+        return None
+    return type(aggregate), source, aggregate.output_field
+
+
+def get_query_shape(queryset):
+    """
+    Describe a `values(bucket=TimeBucket(...)).annotate(...)` queryset, returns
+    None when the query contains anything that can't be rewritten.
+    """
+    query = queryset.query
+    if queryset._iterable_class is not ValuesIterable or query.distinct or query.extra \
+            or query.combinator or len(query.alias_map) > 1:
+        return None
+    if set(query.annotations) != set(query.annotation_select):
+        return None
+
+    bucket = interval = time_field = None
+    aggregates = {}
+    for alias, annotation in query.annotations.items():
+        if isinstance(annotation, TimeBucket):
+            source = annotation.get_source_expressions()
+            if bucket is not None or len(source) != 2 or not isinstance(source[1], Col):
+                return None
+            bucket, interval, time_field = alias, source[0], source[1].target
+        elif isinstance(annotation, models.Aggregate):
+            aggregate = _describe_aggregate(annotation)
+            if aggregate is None:
+                return None
+            aggregates[alias] = aggregate
+        else:
+            return None
+    if bucket is None or parse_interval(interval) is None:
+        return None
+
+    group_by = tuple(query.values_select)
+    if any(LOOKUP_SEP in name for name in group_by):
+        return None
+
+    where = query.where
+    if where.negated or (where.connector != AND and len(where.children) > 1):
+        return None
+    filters = []
+    for lookup in where.children:
+        if not isinstance(lookup, Lookup) or not isinstance(lookup.lhs, Col) \
+                or hasattr(lookup.rhs, 'resolve_expression'):
+            return None
+        filters.append((lookup.lhs.target, lookup.lookup_name, lookup.rhs))
+
+    ordering = []
+    for name in query.order_by:
+        if not isinstance(name, str) or name.lstrip('-') not in (bucket, *group_by, *aggregates):
+            return None
+        ordering.append(name)
+
+    return QueryShape(query.model, time_field, interval, bucket, group_by, aggregates, filters, ordering)
+
+
+@lru_cache(maxsize=None)
+def get_continuous_aggregate_shape(model):
+    """
+    Describe the definition of a `TimescaleContinuousAggregate` model in terms
+    of the field names of the model.
+    """
+    shape = get_query_shape(model.get_aggregate_queryset())
+    if shape is None or shape.filters:
+        return None
+
+    names = {field.column: field.name for field in model._meta.concrete_fields}
+    if not all(alias in names for alias in (shape.bucket, *shape.group_by, *shape.aggregates)):
+        return None
+
+    return shape._replace(
+        bucket=names[shape.bucket],
+        group_by=tuple(names[alias] for alias in shape.group_by),
+        aggregates={names[alias]: aggregate for alias, aggregate in shape.aggregates.items()},
+    )
+
+
+@lru_cache(maxsize=None)
+def get_continuous_aggregates(model):
+    """
+    Get the continuous aggregates defined on top of the model, coarsest
+    buckets first.
+    """
+    from timescale.db.models.models import TimescaleContinuousAggregate
+
+    continuous_aggregates = []
+    for candidate in apps.get_models():
+        if issubclass(candidate, TimescaleContinuousAggregate):
+            shape = get_continuous_aggregate_shape(candidate)
+            if shape is not None and shape.model is model:
+                continuous_aggregates.append((candidate, shape))
+
+    return sorted(continuous_aggregates, key=lambda item: parse_interval(item[1].interval), reverse=True)
+
+
+def _rewrite(queryset, shape, model, rollup):
+    interval = parse_interval(shape.interval)
+    rollup_interval = parse_interval(rollup.interval)
+    if rollup.time_field != shape.time_field or interval % rollup_interval:
+        return None
+    if not set(shape.group_by) <= set(rollup.group_by):
+        return None
+
+    routed = model._default_manager.using(queryset.db)
+    for field, lookup_name, value in shape.filters:
+        if field.name in rollup.group_by:
+            name = field.name
+        elif field == rollup.time_field and lookup_name in BUCKET_LOOKUPS \
+                and is_bucket_aligned(value, rollup_interval):
+            name = rollup.bucket
+        else:
+            return None
+        routed = routed.filter(**{'%s__%s' % (name, lookup_name): value})
+
+    available = {(kind, source): name for name, (kind, source, output_field) in rollup.aggregates.items()}
+    annotations = {}
+    for alias, (kind, source, output_field) in shape.aggregates.items():
+        if kind is Avg:
+            total, count = available.get((Sum, source)), available.get((Count, source))
+            if total is None or count is None:
+                return None
+            annotations[alias] = Cast(Sum(total), models.FloatField()) / Cast(Sum(count), models.FloatField())
+        elif (kind, source) in available:
+            annotations[alias] = REAGGREGATES[kind](available[(kind, source)], output_field=output_field)
+        else:
+            return None
+
+    # the selected names may clash with the fields of the rollup, so the
+    # rewritten query selects placeholders which are renamed on fetch
+    renames = {'routed_%d' % index: alias for index, alias in enumerate((shape.bucket, *annotations))}
+    aliases = {alias: name for name, alias in renames.items()}
+
+    routed = routed.values(*shape.group_by, **{aliases[shape.bucket]: TimeBucket(rollup.bucket, shape.interval)})
+    routed = routed.annotate(**{aliases[alias]: expression for alias, expression in annotations.items()})
+    routed = routed.order_by(*(
+        ('-' if name.startswith('-') else '') + aliases.get(name.lstrip('-'), name.lstrip('-'))
+        for name in shape.ordering
+    ))
+    routed.query.set_limits(queryset.query.low_mark, queryset.query.high_mark)
+    return Route(routed, renames)
+
+
+def get_continuous_aggregate_route(queryset):
+    """
+    Find a continuous aggregate that can answer the time_bucket query, returns
+    the rewritten queryset over the rollup together with the names its results
+    have to be renamed with, or None. Materialized only continuous aggregates
+    are skipped, they miss the buckets after their watermark.
+    """
+    shape = get_query_shape(queryset)
+    if shape is None:
+        return None
+
+    for model, rollup in get_continuous_aggregates(shape.model):
+        route = _rewrite(queryset, shape, model, rollup)
+        if route is not None and not model.timescale.db_manager(queryset.db).is_materialized_only():
+            return route
+    return None
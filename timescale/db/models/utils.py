@@ -0,0 +1,169 @@
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Optional
+
+from django.db import models
+from django.db.models.expressions import Col
+from django.db.models.lookups import Lookup
+from django.db.models.sql.where import AND
+from django.utils import timezone
+
+from timescale.db.models.fields import TimescaleDateTimeField
+
+
+# time_bucket aligns buckets of timestamptz values on this origin (a monday)
+TIME_BUCKET_ORIGIN = datetime(2000, 1, 3, tzinfo=dt_timezone.utc)
+
+INTERVAL_UNITS = {
+    'microsecond': timedelta(microseconds=1),
+    'microseconds': timedelta(microseconds=1),
+    'us': timedelta(microseconds=1),
+    'millisecond': timedelta(milliseconds=1),
+    'milliseconds': timedelta(milliseconds=1),
+    'ms': timedelta(milliseconds=1),
+    'second': timedelta(seconds=1),
+    'seconds': timedelta(seconds=1),
+    'sec': timedelta(seconds=1),
+    'secs': timedelta(seconds=1),
+    's': timedelta(seconds=1),
+    'minute': timedelta(minutes=1),
+    'minutes': timedelta(minutes=1),
+    'min': timedelta(minutes=1),
+    'mins': timedelta(minutes=1),
+    'm': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'hours': timedelta(hours=1),
+    'hr': timedelta(hours=1),
+    'hrs': timedelta(hours=1),
+    'h': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'days': timedelta(days=1),
+    'd': timedelta(days=1),
+    'week': timedelta(weeks=1),
+    'weeks': timedelta(weeks=1),
+    'w': timedelta(weeks=1),
+}
+
+interval_re = re.compile(r'\s*(\d+(?:\.\d+)?)\s*([a-z]+)\s*(?=\d|$)')
+
+
+def get_time_field(model):
+    """
+    Get the `TimescaleDateTimeField` of the model, the partition column of its
+    hypertable, or None.
+    """
+    return next(
+        (field for field in model._meta.local_concrete_fields if isinstance(field, TimescaleDateTimeField)), None
+    )
+
+
+def parse_interval(interval) -> Optional[timedelta]:
+    """
+    Convert an interval e.g '1 day', '15 minutes', '1 hour 30 minutes' to a
+    timedelta. Returns None for intervals without a fixed length (months,
+    years) or that can't be parsed.
+    """
+    if isinstance(interval, models.Value):
+        interval = interval.value
+    if isinstance(interval, timedelta):
+        return interval
+    if not isinstance(interval, str):
+        return None
+
+    value = interval.strip().lower()
+    result = timedelta()
+    position = 0
+    for match in interval_re.finditer(value):
+        if match.start() != position:
+            return None
+        unit = INTERVAL_UNITS.get(match.group(2))
+        if unit is None:
+            return None
+        result += unit * float(match.group(1))
+        position = match.end()
+
+    if not value or position != len(value):
+        return None
+    return result
+
+
+def is_bucket_aligned(value: datetime, interval: timedelta) -> bool:
+    """
+    Check if the timestamp is the start of a time_bucket of the interval
+    """
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return (value - TIME_BUCKET_ORIGIN) % interval == timedelta()
+
+
+def align_bucket(value: datetime, interval: timedelta) -> datetime:
+    """
+    Get the start of the time_bucket of the interval containing the timestamp
+    """
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value - (value - TIME_BUCKET_ORIGIN) % interval
+
+
+def get_time_bounds(query, field):
+    """
+    Get the lower and upper bounds a query filters the field on, e.g with
+    `time__range` or `time__gte`. Either is None when not filtered.
+    """
+    start = end = None
+    where = query.where
+    if where.negated or (where.connector != AND and len(where.children) > 1):
+        return start, end
+
+    for lookup in where.children:
+        if not isinstance(lookup, Lookup) or not isinstance(lookup.lhs, Col) or lookup.lhs.target != field \
+                or hasattr(lookup.rhs, 'resolve_expression'):
+            continue
+        if lookup.lookup_name == 'range':
+            start, end = lookup.rhs
+        elif lookup.lookup_name in ('gt', 'gte'):
+            start = lookup.rhs
+        elif lookup.lookup_name in ('lt', 'lte'):
+            end = lookup.rhs
+    return start, end
+
+
+def sort_rows(rows, ordering):
+    """
+    Sort dict rows in place by `order_by` style names. NULLs sort like
+    PostgreSQL, last ascending and first descending.
+    """
+    # stable sorts from the last to the first key
+    for name in reversed(ordering):
+        key = name.lstrip('-')
+        rows.sort(
+            key=lambda row: (True, 0) if row[key] is None else (False, row[key]),
+            reverse=name.startswith('-'),
+        )
+    return rows
+
+
+def time_argument_sql(value):
+    """
+    Get the SQL and params for an argument of a Timescale function that
+    accepts either a timestamp or an interval, e.g `older_than`. Strings are
+    treated as intervals.
+    """
+    if isinstance(value, str):
+        return 'CAST(%s AS interval)', [value]
+    return '%s', [value]
+
+
+def normalise_row(row, names=('bucket',)):
+    """
+    Replace the datetimes in the `names` columns of a result row with their
+    ISO 8601 representation, dict rows are updated in place. Rows that aren't
+    dicts have every datetime replaced.
+    """
+    if isinstance(row, dict):
+        for name in names:
+            value = row.get(name)
+            if isinstance(value, datetime):
+                row[name] = value.isoformat()
+        return row
+    return tuple(value.isoformat() if isinstance(value, datetime) else value for value in row)
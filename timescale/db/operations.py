@@ -1,6 +1,148 @@
+from django.apps import apps as global_apps
 from django.contrib.postgres.operations import CreateExtension
+from django.db import router
+from django.db.migrations.operations.base import Operation
 
 
 class TimescaleExtension(CreateExtension):
     def __init__(self):
-        self.name = "timescaledb"
\ No newline at end of file
+        self.name = "timescaledb"
+
+
+class ContinuousAggregateOperation(Operation):
+    """
+    Base class for the operations on a `TimescaleContinuousAggregate` model.
+    These only touch the database, the model state itself is handled by the
+    regular (unmanaged) `CreateModel` operation.
+    """
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    @property
+    def model_name_lower(self):
+        return self.model_name.lower()
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def allow_migrate(self, schema_editor, app_label):
+        return router.allow_migrate(schema_editor.connection.alias, app_label, model_name=self.model_name_lower)
+
+    def deconstruct(self):
+        return self.__class__.__name__, [], {'model_name': self.model_name}
+
+
+class CreateContinuousAggregate(ContinuousAggregateOperation):
+    """
+    Create the continuous aggregate of a `TimescaleContinuousAggregate` model.
+    `definition` is the SQL of the view, frozen when the migration is written
+    by the `make_continuous_aggregate_migration` command. Without it the
+    definition is compiled from `get_aggregate_queryset` of the current model,
+    as historical models don't carry methods, so the migration changes with
+    the model. `materialized_only` is always set on the view.
+
+    There is no operation altering the definition, a changed rollup is
+    deployed by deleting the continuous aggregate and creating it again.
+    """
+    reversible = True
+
+    def __init__(self, model_name, definition=None, materialized_only=False):
+        super().__init__(model_name)
+        self.definition = definition
+        self.materialized_only = materialized_only
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if self.allow_migrate(schema_editor, app_label):
+            model = to_state.apps.get_model(app_label, self.model_name)
+            definition = self.definition
+            if definition is None:
+                definition = schema_editor.compile_continuous_aggregate(
+                    global_apps.get_model(app_label, self.model_name).get_aggregate_queryset()
+                )
+            schema_editor.create_continuous_aggregate(model, definition, materialized_only=self.materialized_only)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if self.allow_migrate(schema_editor, app_label):
+            model = from_state.apps.get_model(app_label, self.model_name)
+            schema_editor.delete_continuous_aggregate(model)
+
+    def deconstruct(self):
+        name, args, kwargs = super().deconstruct()
+        if self.definition is not None:
+            kwargs['definition'] = self.definition
+        if self.materialized_only:
+            kwargs['materialized_only'] = True
+        return name, args, kwargs
+
+    def describe(self):
+        return "Create continuous aggregate %s" % self.model_name
+
+    @property
+    def migration_name_fragment(self):
+        return "create_continuous_aggregate_%s" % self.model_name_lower
+
+
+class AddContinuousAggregatePolicy(ContinuousAggregateOperation):
+    """
+    Add a refresh policy to the continuous aggregate, so the rollup is
+    materialized in the background instead of computed at query time.
+    """
+    reversible = True
+
+    def __init__(self, model_name, start_offset, end_offset, schedule_interval):
+        super().__init__(model_name)
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+        self.schedule_interval = schedule_interval
+
+    def _add_policy(self, schema_editor, model):
+        schema_editor.add_continuous_aggregate_policy(
+            model, self.start_offset, self.end_offset, self.schedule_interval
+        )
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if self.allow_migrate(schema_editor, app_label):
+            self._add_policy(schema_editor, to_state.apps.get_model(app_label, self.model_name))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if self.allow_migrate(schema_editor, app_label):
+            schema_editor.remove_continuous_aggregate_policy(from_state.apps.get_model(app_label, self.model_name))
+
+    def deconstruct(self):
+        name, args, kwargs = super().deconstruct()
+        kwargs.update({
+            'start_offset': self.start_offset,
+            'end_offset': self.end_offset,
+            'schedule_interval': self.schedule_interval,
+        })
+        return name, args, kwargs
+
+    def describe(self):
+        return "Add refresh policy to continuous aggregate %s" % self.model_name
+
+    @property
+    def migration_name_fragment(self):
+        return "add_policy_%s" % self.model_name_lower
+
+
+class RemoveContinuousAggregatePolicy(AddContinuousAggregatePolicy):
+    """
+    Remove the refresh policy of the continuous aggregate, the policy
+    arguments are kept to be able to reverse the operation.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if self.allow_migrate(schema_editor, app_label):
+            schema_editor.remove_continuous_aggregate_policy(to_state.apps.get_model(app_label, self.model_name))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if self.allow_migrate(schema_editor, app_label):
+            self._add_policy(schema_editor, from_state.apps.get_model(app_label, self.model_name))
+
+    def describe(self):
+        return "Remove refresh policy from continuous aggregate %s" % self.model_name
+
+    @property
+    def migration_name_fragment(self):
+        return "remove_policy_%s" % self.model_name_lower
@@ -0,0 +1,114 @@
+import os
+import re
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, migrations
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+from django.template.defaultfilters import filesizeformat
+
+from timescale.db.advisor import (
+    DEFAULT_MEMORY_FRACTION, DEFAULT_SAMPLE_CHUNKS, advise_chunk_interval, format_interval, recommend_indexes,
+)
+from timescale.db.models.utils import get_time_field, parse_interval
+
+
+class Command(BaseCommand):
+    help = (
+        "Recommends a chunk_time_interval for hypertables, keeping recent chunks within a fraction of "
+        "shared_buffers at the current ingest rate, and composite indexes for the segment by and space "
+        "partitioning columns. Optionally writes the migrations applying the interval."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.ModelName',
+            help='The hypertable models to inspect, by default every model with a TimescaleDateTimeField.',
+        )
+        parser.add_argument(
+            '--memory-fraction', type=float, default=DEFAULT_MEMORY_FRACTION,
+            help='The fraction of shared_buffers the time slices of chunks of all hypertables should fit into.',
+        )
+        parser.add_argument(
+            '--sample-chunks', type=int, default=DEFAULT_SAMPLE_CHUNKS,
+            help='The number of recent closed time slices the ingest rate is measured on.',
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Nominates a database to inspect. Defaults to the "default" database.',
+        )
+        parser.add_argument(
+            '--write-migrations', action='store_true',
+            help='Write a migration altering the interval of each hypertable that should change.',
+        )
+
+    def get_models(self, labels):
+        if not labels:
+            return [
+                model for model in apps.get_models()
+                if model._meta.managed and not model._meta.proxy and get_time_field(model) is not None
+            ]
+        try:
+            return [apps.get_model(label) for label in labels]
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+
+    def handle(self, *args, **options):
+        for model in self.get_models(options['models']):
+            try:
+                advice = advise_chunk_interval(
+                    model, memory_fraction=options['memory_fraction'], sample_chunks=options['sample_chunks'],
+                    using=options['database'],
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+
+            label = '%s.%s' % (model._meta.label, advice.field.name)
+            for index in recommend_indexes(model):
+                self.stdout.write('%s: consider %s(fields=%r, name=%r)' % (
+                    model._meta.label, index.__class__.__name__, index.fields, index.name
+                ))
+            if advice.recommended_interval is None:
+                self.stdout.write('%s: no closed chunks to measure yet' % label)
+                continue
+
+            recommended = format_interval(advice.recommended_interval)
+            self.stdout.write(
+                '%s: %s per chunk interval of %s, ingesting %s/s, target %s -> recommended interval %s' % (
+                    label, filesizeformat(advice.slice_bytes), advice.current_interval,
+                    filesizeformat(advice.ingest_rate), filesizeformat(advice.target_bytes), recommended,
+                )
+            )
+
+            if options['write_migrations'] and parse_interval(advice.current_interval) != advice.recommended_interval:
+                path = self.write_migration(model, advice.field, recommended)
+                self.stdout.write(self.style.SUCCESS('  wrote %s' % path))
+                self.stdout.write(
+                    "  update %s to interval=%r to keep the model in sync" % (label, recommended)
+                )
+
+    def write_migration(self, model, field, interval):
+        """
+        Write a migration altering the interval of the field, applying it calls
+        `set_chunk_time_interval`.
+        """
+        app_label = model._meta.app_label
+        leaf_nodes = MigrationLoader(None, ignore_no_migrations=True).graph.leaf_nodes(app_label)
+        number = max((int(re.match(r'\d*', name).group() or 0) for app, name in leaf_nodes), default=0) + 1
+
+        name, path, args, kwargs = field.deconstruct()
+        kwargs['interval'] = interval
+        new_field = field.__class__(*args, **kwargs)
+
+        migration = migrations.Migration('%04i_%s_chunk_interval' % (number, model._meta.model_name), app_label)
+        migration.dependencies = leaf_nodes
+        migration.operations = [
+            migrations.AlterField(model_name=model._meta.model_name, name=field.name, field=new_field),
+        ]
+
+        writer = MigrationWriter(migration)
+        os.makedirs(os.path.dirname(writer.path), exist_ok=True)
+        with open(writer.path, 'w', encoding='utf-8') as fh:
+            fh.write(writer.as_string())
+        return writer.path
@@ -0,0 +1,65 @@
+import os
+import re
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, migrations
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+
+from timescale.db.models.models import TimescaleContinuousAggregate
+from timescale.db.operations import CreateContinuousAggregate
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the migrations creating the continuous aggregates of TimescaleContinuousAggregate models, "
+        "the view definitions are compiled from get_aggregate_queryset and frozen into the migrations. "
+        "Run makemigrations first to record the models."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='+', metavar='app_label.ModelName',
+            help='The continuous aggregate models to create.',
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Nominates the database the definitions are compiled for. Defaults to the "default" database.',
+        )
+
+    def get_models(self, labels):
+        try:
+            models = [apps.get_model(label) for label in labels]
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        for model in models:
+            if not issubclass(model, TimescaleContinuousAggregate):
+                raise CommandError("%s isn't a TimescaleContinuousAggregate." % model._meta.label)
+        return models
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        for model in self.get_models(options['models']):
+            with connection.schema_editor(collect_sql=True, atomic=False) as schema_editor:
+                definition = schema_editor.compile_continuous_aggregate(model.get_aggregate_queryset())
+            operation = CreateContinuousAggregate(
+                model_name=model.__name__, definition=definition, materialized_only=model.materialized_only
+            )
+            path = self.write_migration(model, operation)
+            self.stdout.write(self.style.SUCCESS('%s: wrote %s' % (model._meta.label, path)))
+
+    def write_migration(self, model, operation):
+        app_label = model._meta.app_label
+        leaf_nodes = MigrationLoader(None, ignore_no_migrations=True).graph.leaf_nodes(app_label)
+        number = max((int(re.match(r'\d*', name).group() or 0) for app, name in leaf_nodes), default=0) + 1
+
+        migration = migrations.Migration('%04i_%s' % (number, operation.migration_name_fragment), app_label)
+        migration.dependencies = leaf_nodes
+        migration.operations = [operation]
+
+        writer = MigrationWriter(migration)
+        os.makedirs(os.path.dirname(writer.path), exist_ok=True)
+        with open(writer.path, 'w', encoding='utf-8') as fh:
+            fh.write(writer.as_string())
+        return writer.path